@@ -0,0 +1,206 @@
+import asyncio
+import json
+import random
+import zlib
+from aiohttp import web
+
+
+SCMP_SECTIONS = ["china", "asia", "world", "business", "tech", "lifestyle"]
+SILLOK_KINGS = [f"kda_{i:03d}" for i in range(1, 28)]
+
+FILLER_EN = (
+    "Officials said on Tuesday that the policy would be reviewed as part of a "
+    "wider effort to stabilise the economy and reassure investors in the region. "
+)
+FILLER_KO = "임금이 전교하기를, 백성의 일을 소홀히 하지 말라 하였다. 대신들이 아뢰기를 옳다고 하였다. "
+
+
+def get_default_settings():
+    return {
+        "page_size_kb": 64,
+        "fanout": 20,
+        "latency_ms": 20,
+        "latency_jitter_ms": 10,
+        "error_rate": 0.0,
+        "seed": 503,
+    }
+
+
+def get_rng(settings, path):
+    """Returns a random generator that is stable for a given path and seed."""
+    return random.Random(settings["seed"] ^ zlib.crc32(path.encode("utf-8")))
+
+
+def pad_paragraphs(filler, size_bytes, rng):
+    paragraphs = []
+    total = 0
+    while total < size_bytes:
+        paragraph = f"<p class='p-{rng.randint(0, 9)}'>{filler * rng.randint(2, 6)}</p>"
+        paragraphs.append(paragraph)
+        total += len(paragraph.encode("utf-8"))
+    return "\n".join(paragraphs)
+
+
+def page_head(title):
+    return (
+        "<head>"
+        f"<title>{title}</title>"
+        "<link rel='stylesheet' href='/static/site.css'>"
+        "<style>body { font-family: sans-serif; }</style>"
+        "<script>window.dataLayer = window.dataLayer || [];</script>"
+        "</head>"
+    )
+
+
+def render_scmp_section(section, settings, rng):
+    links = []
+    for i in range(settings["fanout"]):
+        article_id = rng.randint(3000000, 3999999)
+        links.append(
+            "<div data-qa='Component-Headline'>"
+            f"<h2><a href='/news/{section}/article/{article_id}' onclick='track({i})'>"
+            f"China headline {i} in {section}</a></h2></div>"
+        )
+    images = "".join(
+        f"<div class='article-img'><img src='/images/{section}/{i}.jpg' alt='Image {i}'></div>"
+        for i in range(max(1, settings["fanout"] // 4))
+    )
+    body = pad_paragraphs(FILLER_EN, settings["page_size_kb"] * 1024, rng)
+    return (
+        f"<!DOCTYPE html><html>{page_head(section)}<body onload='init()'>"
+        f"<nav>{''.join(links)}</nav>{images}<main>{body}</main>"
+        "<script>console.log('footer');</script></body></html>"
+    )
+
+
+def render_scmp_article(section, article_id, settings, rng):
+    figures = "".join(
+        f"<figure><img src='/images/{section}/{article_id}_{i}.jpg' alt='Figure {i}'>"
+        f"<figcaption>Caption {i}</figcaption></figure>"
+        for i in range(3)
+    )
+    related = "".join(
+        f"<li><a href='/news/{section}/article/{rng.randint(3000000, 3999999)}'>"
+        f"Related {i}</a></li>"
+        for i in range(max(1, settings["fanout"] // 4))
+    )
+    body = pad_paragraphs(FILLER_EN, settings["page_size_kb"] * 1024, rng)
+    # Article data embedded the way Next.js pages do it
+    next_data = json.dumps(
+        {
+            "props": {
+                "pageProps": {
+                    "article": {
+                        "id": article_id,
+                        "headline": f"China article {article_id}",
+                        "section": section,
+                        "images": [
+                            f"/images/{section}/{article_id}_{i}.jpg" for i in range(3)
+                        ],
+                    }
+                }
+            }
+        }
+    )
+    return (
+        f"<!DOCTYPE html><html>{page_head(article_id)}<body>"
+        f"<div data-qa='Component-Headline'><h2>China article {article_id}</h2></div>"
+        f"<article>{figures}{body}</article>"
+        f"<ul class='related'>{related}</ul>"
+        f"<script id='__NEXT_DATA__' type='application/json'>{next_data}</script>"
+        "</body></html>"
+    )
+
+
+def render_sillok_day(day_id, settings, rng):
+    links = "".join(
+        f"<li><a href='/id/{day_id}_{i:03d}?id={day_id}_{i:03d}'>기사 {i}</a></li>"
+        for i in range(settings["fanout"])
+    )
+    body = pad_paragraphs(FILLER_KO, settings["page_size_kb"] * 1024, rng)
+    return (
+        f"<!DOCTYPE html><html>{page_head(day_id)}<body>"
+        f"<div id='cont_area'><ul class='day-list'>{links}</ul>"
+        f"<div class='ins_view_pd'>{body}</div></div></body></html>"
+    )
+
+
+def create_app(settings=None):
+    """
+    Create the fixture application serving synthetic SCMP-like and sillok-like pages.
+
+    Args:
+        settings (dict): Page size, link fan-out, latency and error rate overrides.
+
+    Returns:
+        web.Application: The configured aiohttp application.
+    """
+    config = get_default_settings()
+    config.update(settings or {})
+    error_rng = random.Random(config["seed"])
+
+    async def simulate(request):
+        rng = get_rng(config, request.path_qs)
+        delay = config["latency_ms"] + rng.uniform(0, config["latency_jitter_ms"])
+        await asyncio.sleep(delay / 1000)
+        # Errors come from a server-wide generator so that retries can succeed
+        if error_rng.random() < config["error_rate"]:
+            raise web.HTTPInternalServerError(text="Synthetic error")
+        return rng
+
+    async def scmp_section(request):
+        rng = await simulate(request)
+        return web.Response(
+            text=render_scmp_section(request.match_info["section"], config, rng),
+            content_type="text/html",
+        )
+
+    async def scmp_article(request):
+        rng = await simulate(request)
+        return web.Response(
+            text=render_scmp_article(
+                request.match_info["section"],
+                request.match_info["article_id"],
+                config,
+                rng,
+            ),
+            content_type="text/html",
+        )
+
+    async def sillok_day(request):
+        rng = await simulate(request)
+        return web.Response(
+            text=render_sillok_day(request.match_info["day_id"], config, rng),
+            content_type="text/html",
+        )
+
+    async def image(request):
+        await simulate(request)
+        return web.Response(
+            body=b"\xff\xd8\xff\xe0" + b"\0" * 2048, content_type="image/jpeg"
+        )
+
+    app = web.Application()
+    app.add_routes(
+        [
+            web.get("/news/{section}", scmp_section),
+            web.get("/news/{section}/article/{article_id}", scmp_article),
+            web.get("/id/{day_id}", sillok_day),
+            web.get("/images/{tail:.*}", image),
+        ]
+    )
+    return app
+
+
+def serve(settings, port_queue, host="127.0.0.1", port=0):
+    """Run the fixture server until the process is terminated, reporting the bound port."""
+
+    async def run():
+        runner = web.AppRunner(create_app(settings), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        port_queue.put(runner.addresses[0][1])
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
@@ -0,0 +1,364 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.fixture_server import SCMP_SECTIONS, SILLOK_KINGS, serve
+
+
+SCENARIOS = [
+    "url_extractor",
+    "html_crawler",
+    "text_extractor",
+    "image_extractor",
+    "clean_html",
+]
+
+
+class LatencyRecorder:
+    """Wraps the BaseCrawler fetch methods to record the latency of every page."""
+
+    def __init__(self):
+        self.latencies = []
+
+    def install(self):
+        from src.crawler.spiders.BaseCrawler import BaseCrawler
+
+        fetch_page = BaseCrawler.fetch_page
+        fetch_bytes_async = BaseCrawler.fetch_bytes_async
+        latencies = self.latencies
+
+        def timed_fetch_page(crawler, url, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fetch_page(crawler, url, *args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        # fetch_response_async reads the page through fetch_bytes_async
+        async def timed_fetch_bytes_async(crawler, url, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fetch_bytes_async(crawler, url, *args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        BaseCrawler.fetch_page = timed_fetch_page
+        BaseCrawler.fetch_bytes_async = timed_fetch_bytes_async
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def get_peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_url_extractor(base_url, pages, work_dir):
+    # The traversal size is set by the server fan-out rather than the page count
+    from src.crawler.spiders.UrlExtractor import UrlExtractor
+
+    crawler = UrlExtractor(
+        base_url=base_url,
+        output_dir=work_dir,
+        source_name="bench_urls",
+        targets=[
+            {"url": f"{base_url}/news/china", "xpath": "//a[contains(., 'China')]"},
+            {"url": base_url, "xpath": "//ul[@class='related']//a"},
+        ],
+    )
+    crawler.crawl()
+
+
+def run_html_crawler(base_url, pages, work_dir):
+    from src.crawler.spiders.HTMLCrawler import HTMLCrawler
+
+    input_file = os.path.join(work_dir, "input.json")
+    with open(input_file, "w", encoding="utf-8") as f:
+        json.dump(
+            [
+                {"depth": 0, "url": f"{base_url}/id/{day_id}?id={day_id}", "path": ""}
+                for day_id in get_sillok_ids(pages)
+            ],
+            f,
+        )
+    crawler = HTMLCrawler(
+        base_url=base_url,
+        output_dir=os.path.join(work_dir, "html"),
+        targets=[
+            {
+                "input_file": input_file,
+                "xpath": "//div[@class='ins_view_pd']",
+                "file_key": "id",
+                "resumable": False,
+            }
+        ],
+    )
+    crawler.crawl()
+
+
+def run_text_extractor(base_url, pages, work_dir):
+    from src.crawler.spiders.TextExtractor import TextExtractor
+
+    crawler = TextExtractor(
+        base_url=base_url,
+        output_dir=work_dir,
+        source_name="bench_text",
+        targets=[
+            {"url": url, "xpath": "//div[@data-qa='Component-Headline']//h2"}
+            for url in get_scmp_urls(base_url, pages)
+        ],
+    )
+    crawler.crawl()
+
+
+def run_image_extractor(base_url, pages, work_dir):
+    from src.crawler.spiders.ImageExtractor import ImageExtractor
+
+    crawler = ImageExtractor(
+        base_url=base_url,
+        output_dir=work_dir,
+        source_name="bench_images",
+        targets=[
+            {
+                "url": url,
+                "xpath": "//div[contains(@class, 'article-img')]//img",
+                "save_images": False,
+            }
+            for url in get_scmp_urls(base_url, pages)
+        ],
+    )
+    crawler.crawl()
+
+
+def fetch_clean_html_documents(base_url, pages):
+    import requests
+
+    with requests.Session() as session:
+        return [
+            session.get(f"{base_url}/id/{day_id}?id={day_id}").text
+            for day_id in get_sillok_ids(min(pages, 20))
+        ]
+
+
+def run_clean_html(documents, pages, latencies):
+    from src.crawler.utils.clean_html import clean_html
+
+    # Clean html is CPU bound, so the fetched documents are cycled to reach the page count
+    for i in range(pages):
+        start = time.perf_counter()
+        clean_html(documents[i % len(documents)], "//div[@class='ins_view_pd']")
+        latencies.append(time.perf_counter() - start)
+
+
+RUNNERS = {
+    "url_extractor": run_url_extractor,
+    "html_crawler": run_html_crawler,
+    "text_extractor": run_text_extractor,
+    "image_extractor": run_image_extractor,
+}
+
+
+def get_scmp_urls(base_url, pages):
+    return [
+        f"{base_url}/news/{SCMP_SECTIONS[i % len(SCMP_SECTIONS)]}/article/{3000000 + i}"
+        for i in range(pages)
+    ]
+
+
+def get_sillok_ids(pages):
+    return [
+        f"{SILLOK_KINGS[i % len(SILLOK_KINGS)]}_{i // len(SILLOK_KINGS):05d}"
+        for i in range(pages)
+    ]
+
+
+def run_scenario(name, base_url, pages, result_queue):
+    """Run a single scenario in a fresh process so that CPU and RSS are isolated."""
+    logging.basicConfig(level=logging.WARNING)
+    recorder = LatencyRecorder()
+
+    if name == "clean_html":
+        documents = fetch_clean_html_documents(base_url, pages)
+
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as work_dir:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if name == "clean_html":
+            run_clean_html(documents, pages, recorder.latencies)
+        else:
+            recorder.install()
+            RUNNERS[name](base_url, pages, work_dir)
+        cpu_seconds = time.process_time() - cpu_start
+        wall_seconds = time.perf_counter() - wall_start
+
+    latencies = recorder.latencies
+    result_queue.put(
+        {
+            "pages": len(latencies),
+            "wall_seconds": wall_seconds,
+            "pages_per_sec": len(latencies) / wall_seconds if wall_seconds else None,
+            "latency_p50_ms": (percentile(latencies, 50) or 0) * 1000,
+            "latency_p99_ms": (percentile(latencies, 99) or 0) * 1000,
+            "latency_mean_ms": (statistics.fmean(latencies) if latencies else 0) * 1000,
+            "cpu_seconds": cpu_seconds,
+            "cpu_percent": 100 * cpu_seconds / wall_seconds if wall_seconds else None,
+            "peak_rss_mb": get_peak_rss_mb(),
+        }
+    )
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(scenarios, server_settings, pages, repeat=1):
+    """
+    Start the fixture server and run each scenario against it.
+
+    Args:
+        scenarios (list): Names of the scenarios to run.
+        server_settings (dict): Settings passed to the fixture server.
+        pages (int): Number of pages each scenario should process.
+        repeat (int): Number of runs per scenario; the fastest run is kept.
+
+    Returns:
+        dict: Benchmark metadata and per-scenario metrics.
+    """
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    server = context.Process(
+        target=serve, args=(server_settings, port_queue), daemon=True
+    )
+    server.start()
+
+    results = {}
+    try:
+        base_url = f"http://127.0.0.1:{port_queue.get(timeout=30)}"
+        for name in scenarios:
+            runs = []
+            for _ in range(repeat):
+                result_queue = context.Queue()
+                process = context.Process(
+                    target=run_scenario, args=(name, base_url, pages, result_queue)
+                )
+                process.start()
+                runs.append(result_queue.get())
+                process.join()
+            results[name] = max(runs, key=lambda run: run["pages_per_sec"] or 0)
+            print(
+                f"{name:>16}: {results[name]['pages']} pages, "
+                f"{results[name]['pages_per_sec']:.1f} pages/s, "
+                f"p50 {results[name]['latency_p50_ms']:.1f} ms, "
+                f"p99 {results[name]['latency_p99_ms']:.1f} ms, "
+                f"peak RSS {results[name]['peak_rss_mb']:.1f} MB"
+            )
+    finally:
+        server.terminate()
+        server.join()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": get_git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pages": pages,
+            "repeat": repeat,
+            "server": server_settings,
+        },
+        "scenarios": results,
+    }
+
+
+def compare_results(baseline_path, current_path):
+    """Print the relative change of every metric between two result files."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["scenarios"]
+    with open(current_path, "r", encoding="utf-8") as f:
+        current = json.load(f)["scenarios"]
+
+    for name in current:
+        if name not in baseline:
+            continue
+        print(name)
+        for metric, value in current[name].items():
+            before = baseline[name].get(metric)
+            if not isinstance(value, (int, float)) or not before:
+                continue
+            change = 100 * (value - before) / before
+            print(f"  {metric:>18}: {before:12.2f} -> {value:12.2f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the crawlers locally")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--page-size-kb", type=int, default=64)
+    parser.add_argument("--fanout", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--latency-jitter-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=503)
+    parser.add_argument("--output", default=None)
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASELINE", "CURRENT"),
+        help="Compare two result files instead of running the benchmarks",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    server_settings = {
+        "page_size_kb": args.page_size_kb,
+        "fanout": args.fanout,
+        "latency_ms": args.latency_ms,
+        "latency_jitter_ms": args.latency_jitter_ms,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+    }
+    results = run_benchmarks(args.scenarios, server_settings, args.pages, args.repeat)
+
+    output = args.output or Path("benchmarks") / "results" / (
+        f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,37 @@
 import sys
 import os
-import json
+import importlib
 import logging
 from pathlib import Path
 
 from src.utils.logging import setup_logging
 from src.utils.config import load_config
-from src.crawler.utils.files import save_json
 
-# Import the classes directly from their respective modules
-from src.crawler.spiders.BaseCrawler import BaseCrawler
-from src.crawler.spiders.UrlExtractor import UrlExtractor
-from src.crawler.spiders.ImageExtractor import ImageExtractor
-from src.crawler.spiders.TextExtractor import TextExtractor
-from src.crawler.spiders.HTMLCrawler import HTMLCrawler
+# Spider modules are imported only when their crawler runs, so a job does not
+# pay for importing lxml, aiohttp and every other spider at startup
+crawler_class_map = {
+    "base_crawler": "src.crawler.spiders.BaseCrawler:BaseCrawler",
+    "url_extractor": "src.crawler.spiders.UrlExtractor:UrlExtractor",
+    "image_extractor": "src.crawler.spiders.ImageExtractor:ImageExtractor",
+    "text_extractor": "src.crawler.spiders.TextExtractor:TextExtractor",
+    "html_crawler": "src.crawler.spiders.HTMLCrawler:HTMLCrawler",
+    "sitemap_extractor": "src.crawler.spiders.SitemapExtractor:SitemapExtractor",
+    "recrawl_crawler": "src.crawler.spiders.RecrawlCrawler:RecrawlCrawler",
+}
+
+
+def get_crawler_class(crawler_class_name):
+    """Import and return the spider class of a crawler name, or None if unknown."""
+    class_path = crawler_class_map.get(crawler_class_name)
+    if class_path is None:
+        return None
+    module_name, class_name = class_path.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 def main():
     # Setup logging
 
-    # Map of crawler names to their class objects
-    crawler_class_map = {
-        "base_crawler": BaseCrawler,
-        "url_extractor": UrlExtractor,
-        "image_extractor": ImageExtractor,
-        "text_extractor": TextExtractor,
-        "html_crawler": HTMLCrawler,
-    }
-
     try:
 
         config = load_config()
@@ -38,12 +42,13 @@ def main():
 
         for crawler_class_name, crawler_class_config in crawler_config.items():
             # Get the correct crawler class from the map
-            crawler_class = crawler_class_map.get(crawler_class_name)
+            crawler_class = get_crawler_class(crawler_class_name)
 
             if not crawler_class:
                 raise ValueError(f"Unknown crawler class: {crawler_class_name}")
             logger = setup_logging(
-                module_name=f"crawler.{crawler_class_name}", num_log_files=5
+                module_name=f"crawler.{crawler_class_name}",
+                **{"num_log_files": 5, **config.get("logging", {})},
             )
             logger.info(f"Starting {crawler_class_name} script")
             logger.info(f"Running crawler: {crawler_class_name}")
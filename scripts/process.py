@@ -0,0 +1,5 @@
+from src.data_processing import main
+
+
+if __name__ == "__main__":
+    main()
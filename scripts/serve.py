@@ -0,0 +1,35 @@
+import argparse
+import os
+
+from aiohttp import web
+
+from src.api.server import create_app, get_page_sources
+from src.utils.config import load_config
+from src.utils.logging import setup_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve pages saved by HTMLCrawler")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--max-age", type=int, default=3600, help="Cache-Control max-age in seconds"
+    )
+    args = parser.parse_args()
+
+    config = load_config()
+    setup_logging(module_name="api", **config.get("logging", {}))
+    database = config.get("database", {})
+    app = create_app(
+        get_page_sources(config),
+        max_age=args.max_age,
+        database_url=database.get("url") or os.environ.get("DATABASE_URL"),
+        cache_size=database.get("cache_size", 1024),
+        cache_ttl=database.get("cache_ttl", 60),
+        pool_options=database.get("pool"),
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
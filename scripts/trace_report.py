@@ -0,0 +1,29 @@
+import argparse
+
+from src.crawler.utils.tracing import format_report, load_traces
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarise an HTMLCrawler trace file (see the trace_file option)"
+    )
+    parser.add_argument("trace_file", help="JSONL trace file written by the crawler")
+    parser.add_argument("--top", type=int, default=20, help="Number of slowest URLs")
+    parser.add_argument(
+        "--min-total-ms",
+        type=float,
+        default=0,
+        help="Ignore URLs that took less than this in total",
+    )
+    args = parser.parse_args()
+
+    records = [
+        record
+        for record in load_traces(args.trace_file)
+        if record["total"] * 1000 >= args.min_total_ms
+    ]
+    print(format_report(records, top=args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+import asyncio
+import datetime
+import json
+import logging
+import time
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from aiohttp import web
+from sqlalchemy import select
+from src.crawler.utils.files import get_filepath
+from src.crawler.utils.mapped_archive import MappedArchiveReader
+from src.crawler.utils.url import get_clean_url
+from src.database import db, schema
+
+
+logger = logging.getLogger(__name__)
+
+
+def setup_routes(app):
+    app.router.add_get("/sources", list_sources)
+    app.router.add_get("/pages/{source}", get_page_by_url)
+    app.router.add_get("/pages/{source}/{name}", get_page_by_name)
+    app.router.add_get("/stats", list_stats)
+    app.router.add_get("/stats/{name}", get_stats)
+    app.router.add_get("/export/{table}", export_table)
+
+
+class QueryCache:
+    """
+    LRU cache of query results that also expire after ttl seconds.
+
+    Entries are tagged with the summary they were read from, so an ingest
+    into one summary only drops that summary's entries. Concurrent misses on
+    the same key share one query.
+
+    Args:
+        max_entries (int): Entries kept before the least recently used is dropped.
+        ttl (float): Seconds an entry is served before it is queried again.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.loading = {}
+        # Invalidations per tag, so a query that started before an
+        # invalidation does not store its now stale result
+        self.generations = {}
+        self.versions = {}
+        self.versions_checked_at = 0.0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key, tag, value):
+        self.entries[key] = (time.monotonic() + self.ttl, tag, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, tag):
+        self.generations[tag] = self.generations.get(tag, 0) + 1
+        for key in [key for key, entry in self.entries.items() if entry[1] == tag]:
+            del self.entries[key]
+
+    async def get_or_load(self, key, tag, load):
+        """Cached value of key, or the result of await load(), which is cached."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        task = self.loading.get(key)
+        if task is None:
+            generation = self.generations.get(tag, 0)
+            task = self.loading[key] = asyncio.ensure_future(load())
+            try:
+                value = await task
+            finally:
+                del self.loading[key]
+            if self.generations.get(tag, 0) == generation:
+                self.set(key, tag, value)
+            return value
+        return await asyncio.shield(task)
+
+    def update_versions(self, versions):
+        """Invalidate the summaries whose version changed since the last check."""
+        for name, version in versions.items():
+            # A summary without a version row yet has never been refreshed,
+            # so its first refresh also drops what was cached while empty
+            if self.versions.get(name, 0) != version:
+                self.invalidate(name)
+                self.versions[name] = version
+
+
+async def list_sources(request):
+    return web.json_response(sorted(request.app["sources"]))
+
+
+def get_source(request):
+    source = request.app["sources"].get(request.match_info["source"])
+    if source is None:
+        raise web.HTTPNotFound(text="Unknown source")
+    return source
+
+
+def get_cache_headers(request):
+    return {"Cache-Control": f"public, max-age={request.app['max_age']}"}
+
+
+async def get_page_by_name(request):
+    """GET /pages/{source}/{name}: a saved page by its file name."""
+    source = get_source(request)
+    name = request.match_info["name"]
+    if source["storage"] == "archive":
+        raise web.HTTPNotFound(text="Archived pages are looked up by url")
+    if (
+        "/" in name
+        or "\\" in name
+        or name.startswith(".")
+        or not name.endswith(".html")
+    ):
+        raise web.HTTPNotFound()
+    return file_response(request, Path(source["output_dir"]) / name)
+
+
+async def get_page_by_url(request):
+    """GET /pages/{source}?url=...: the saved page of a crawled URL."""
+    source = get_source(request)
+    url = request.query.get("url")
+    if not url:
+        raise web.HTTPBadRequest(text="Missing url parameter")
+    clean_url = get_clean_url(url)
+    if source["storage"] == "archive":
+        return await archive_response(request, source, clean_url)
+    file_path = get_filepath(clean_url, source["file_key"], source["output_dir"])
+    return file_response(request, Path(file_path))
+
+
+def file_response(request, file_path):
+    """
+    Serve a saved page from disk.
+
+    FileResponse picks page.html.br or page.html.gz written at crawl time when
+    the client accepts that encoding, answers Range requests and sends the
+    file with sendfile, so pages are never compressed or copied per request.
+    """
+    if not file_path.is_file():
+        raise web.HTTPNotFound()
+    headers = get_cache_headers(request)
+    headers["Content-Type"] = "text/html; charset=utf-8"
+    return web.FileResponse(file_path, headers=headers)
+
+
+def open_reader(app, source_name, output_dir):
+    """
+    Open a source's archive in a thread, sharing one open between requests.
+
+    Opening rebuilds the lookup table when the crawler appended pages since
+    it was built, which reads every sidecar index; it never runs on the loop.
+    """
+    task = app["reader_tasks"].get(source_name)
+    if task is None:
+        app["readers_opened_at"][source_name] = time.monotonic()
+        task = asyncio.ensure_future(load_reader(app, source_name, output_dir))
+        app["reader_tasks"][source_name] = task
+    return asyncio.shield(task)
+
+
+async def load_reader(app, source_name, output_dir):
+    try:
+        reader = await asyncio.to_thread(MappedArchiveReader, output_dir)
+        # A replaced reader is dropped rather than closed, since responses
+        # still being sent may hold views into its segments
+        app["readers"][source_name] = reader
+        return reader
+    finally:
+        del app["reader_tasks"][source_name]
+
+
+async def get_reader(request, source_name, output_dir):
+    reader = request.app["readers"].get(source_name)
+    if reader is None:
+        reader = await open_reader(request.app, source_name, output_dir)
+    return reader
+
+
+def refresh_reader(app, source_name, output_dir):
+    """
+    Reopen a source's archive in the background, at most once per
+    archive_refresh_interval, to pick up pages appended by the crawler.
+    """
+    opened_at = app["readers_opened_at"].get(source_name, 0)
+    if time.monotonic() - opened_at < app["archive_refresh_interval"]:
+        return
+    task = open_reader(app, source_name, output_dir)
+    task.add_done_callback(log_refresh_error)
+
+
+def log_refresh_error(task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Failed to reopen archive: {task.exception()}")
+
+
+def accepts_gzip(request):
+    """Whether the request's Accept-Encoding allows gzip."""
+    for coding in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+async def archive_response(request, source, clean_url):
+    """
+    Serve a page straight from the memory-mapped archive.
+
+    Uncompressed archives hand out a view into the mapped segment, so only
+    the requested range is written to the socket. Compressed archives store
+    each page as its own gzip member, which is sent as-is to clients that
+    accept gzip; other clients and Range requests get the decompressed page.
+    """
+    source_name = request.match_info["source"]
+    reader = await get_reader(request, source_name, source["output_dir"])
+    headers = get_cache_headers(request)
+    headers["Content-Type"] = "text/html; charset=utf-8"
+    headers["Vary"] = "Accept-Encoding"
+    if "Range" not in request.headers and accepts_gzip(request):
+        member = reader.get_gzip_payload(clean_url)
+        if member is not None:
+            headers["Content-Encoding"] = "gzip"
+            return web.Response(body=member, headers=headers)
+
+    payload = reader.get_payload(clean_url)
+    if payload is None:
+        # The crawler may have appended the page since the archive was
+        # opened; it is found once the background reopen finishes
+        refresh_reader(request.app, source_name, source["output_dir"])
+        raise web.HTTPNotFound()
+
+    headers["Accept-Ranges"] = "bytes"
+    try:
+        http_range = request.http_range
+    except ValueError:
+        http_range = slice(None, None)
+    if http_range.start is None and http_range.stop is None:
+        return web.Response(body=payload, headers=headers)
+
+    size = len(payload)
+    start, stop, _ = http_range.indices(size)
+    if start >= stop:
+        raise web.HTTPRequestRangeNotSatisfiable(
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    return web.Response(body=payload[start:stop], status=206, headers=headers)
+
+
+async def run_query(request, query):
+    return await db.fetch_all(request.app["engine"], query)
+
+
+async def check_summary_versions(request):
+    """
+    Drop cached results of summaries that were refreshed by an ingest.
+
+    Ingest bumps the summary's row in summary_versions in the same
+    transaction, so one small query every version_check_interval seconds
+    notices changes made by any process.
+    """
+    cache = request.app["query_cache"]
+    now = time.monotonic()
+    if now - cache.versions_checked_at < request.app["version_check_interval"]:
+        return
+    cache.versions_checked_at = now
+    table = schema.summary_versions
+    rows = await run_query(request, select(table.c.name, table.c.version))
+    cache.update_versions({row["name"]: row["version"] for row in rows})
+
+
+def parse_value(column, value):
+    python_type = column.type.python_type
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat(value)
+    return python_type(value)
+
+
+def build_stats_query(summary, params):
+    """Query over a summary table filtered by its key columns."""
+    table = summary["summary"]
+    query = select(table)
+    for name, value in params.items():
+        if name == "limit":
+            continue
+        if name not in table.c or name == "count":
+            raise web.HTTPBadRequest(text=f"Unknown filter: {name}")
+        try:
+            query = query.where(table.c[name] == parse_value(table.c[name], value))
+        except ValueError:
+            raise web.HTTPBadRequest(text=f"Invalid value for {name}: {value}")
+    try:
+        limit = int(params.get("limit", 1000))
+    except ValueError:
+        raise web.HTTPBadRequest(text="Invalid limit")
+    keys = [column for column in table.primary_key.columns]
+    return query.order_by(*keys).limit(min(max(limit, 1), 10_000))
+
+
+async def list_stats(request):
+    return web.json_response(sorted(schema.SUMMARIES))
+
+
+async def get_stats(request):
+    """
+    GET /stats/{summary}?key=value&limit=n: rows of a materialized summary.
+
+    Results are served from the query cache, so repeated dashboard queries
+    do not reach the database until the summary changes or the entry expires.
+    """
+    if request.app["engine"] is None:
+        raise web.HTTPServiceUnavailable(text="No database configured")
+    name = request.match_info["name"]
+    summary = schema.SUMMARIES.get(name)
+    if summary is None:
+        raise web.HTTPNotFound(text="Unknown summary")
+    params = dict(request.query)
+    query = build_stats_query(summary, params)
+
+    await check_summary_versions(request)
+    key = (name, tuple(sorted(params.items())))
+    rows = await request.app["query_cache"].get_or_load(
+        key, name, partial(run_query, request, query)
+    )
+    return web.json_response(rows, dumps=partial(json.dumps, default=str))
+
+
+# Crawl tables that may be exported, by name
+EXPORT_TABLES = {
+    table.name: table
+    for table in (schema.articles, schema.images, schema.urls, schema.sillok_entries)
+}
+
+
+async def export_table(request):
+    """
+    GET /export/{table}?after=id: every row of a crawl table as JSON lines.
+
+    Rows are read in batches by id and written as they arrive, so neither
+    the server nor the client holds the whole table, and a slow client only
+    holds a pooled connection while each batch is fetched. A client that was
+    cut off resumes with after set to the last id it received.
+    """
+    if request.app["engine"] is None:
+        raise web.HTTPServiceUnavailable(text="No database configured")
+    table = EXPORT_TABLES.get(request.match_info["table"])
+    if table is None:
+        raise web.HTTPNotFound(text="Unknown table")
+    after = None
+    if "after" in request.query:
+        try:
+            after = int(request.query["after"])
+        except ValueError:
+            raise web.HTTPBadRequest(text="Invalid after")
+
+    response = web.StreamResponse(
+        headers={"Content-Type": "application/x-ndjson; charset=utf-8"}
+    )
+    response.enable_compression()
+    await response.prepare(request)
+    await db.write_json_lines(request.app["engine"], table, response.write, after)
+    await response.write_eof()
+    return response
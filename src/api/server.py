@@ -0,0 +1,78 @@
+from aiohttp import web
+from src.api.routes import QueryCache, setup_routes
+from src.database import db
+
+
+# Crawlers whose sources store cleaned HTML pages
+PAGE_CRAWLERS = ["html_crawler", "recrawl_crawler"]
+
+
+def get_page_sources(config):
+    """Where each HTML source stores its pages, keyed by source name."""
+    sources = {}
+    for crawler_name in PAGE_CRAWLERS:
+        crawler_config = config.get("crawler", {}).get(crawler_name, {})
+        for source_name, source_config in crawler_config.get("sources", {}).items():
+            targets = source_config.get("targets") or [{}]
+            sources[source_name] = {
+                "output_dir": source_config.get("output_dir", "data/raw"),
+                "file_key": targets[0].get("file_key"),
+                "storage": targets[0].get("storage", "files"),
+            }
+    return sources
+
+
+async def close_readers(app):
+    # Readers are released rather than closed: a finished response can still
+    # hold a view into a mapped segment, which is unmapped once it is freed
+    app["readers"].clear()
+
+
+async def dispose_engine(app):
+    if app["engine"] is not None:
+        await app["engine"].dispose()
+
+
+def create_app(
+    sources,
+    max_age=3600,
+    database_url=None,
+    cache_size=1024,
+    cache_ttl=60,
+    version_check_interval=1.0,
+    pool_options=None,
+    archive_refresh_interval=30,
+):
+    """
+    Build the aiohttp application that serves stored pages and statistics.
+
+    Args:
+        sources (dict): Output of get_page_sources.
+        max_age (int): Seconds clients may cache a page.
+        database_url (str): URL of the database; /stats and /export are
+            unavailable without one.
+        cache_size (int): Query results kept in memory.
+        cache_ttl (float): Seconds a query result is served from memory.
+        version_check_interval (float): Seconds between checks for
+            summaries refreshed by an ingest.
+        pool_options (dict): Keyword arguments of db.create_engine, e.g.
+            pool_size and max_overflow.
+        archive_refresh_interval (float): Minimum seconds between reopening
+            an archive to find pages appended since it was opened.
+    """
+    app = web.Application()
+    app["sources"] = sources
+    app["readers"] = {}
+    app["reader_tasks"] = {}
+    app["readers_opened_at"] = {}
+    app["archive_refresh_interval"] = archive_refresh_interval
+    app["max_age"] = max_age
+    app["engine"] = None
+    if database_url:
+        app["engine"] = db.create_engine(database_url, **(pool_options or {}))
+    app["query_cache"] = QueryCache(cache_size, cache_ttl)
+    app["version_check_interval"] = version_check_interval
+    setup_routes(app)
+    app.on_cleanup.append(close_readers)
+    app.on_cleanup.append(dispose_engine)
+    return app
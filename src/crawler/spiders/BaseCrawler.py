@@ -1,8 +1,15 @@
+import asyncio
+import json
 import logging
 import requests
 import random
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
 import aiohttp
 from aiohttp import ClientSession
+from src.crawler.utils.concurrency import AdaptiveLimiter
+from src.crawler.utils.encoding import decode_html, detect_encoding
 
 
 class BaseCrawler:
@@ -27,9 +34,17 @@ class BaseCrawler:
         self.rate_limit = kwargs.get("rate_limit", 1)
         self.retries = kwargs.get("retries", 8)
         self.backoff_factor = kwargs.get("backoff_factor", 2)
+        # Defaults of fetch_many
+        self.fetch_concurrency = kwargs.get("fetch_concurrency", 10)
+        self.fetch_timeout = kwargs.get("fetch_timeout", 30)
+        self.max_backoff = kwargs.get("max_backoff", 30)
+        self.fetch_cache_size = kwargs.get("fetch_cache_size", 1024)
+        self.fetch_cache = OrderedDict()
 
         self.session = self._create_session()
         self._async_session = None
+        # aiohttp TraceConfigs attached to the async session, e.g. for tracing
+        self.trace_configs = []
 
         self.logger = logging.getLogger(self.__class__.__name__)
 
@@ -47,7 +62,10 @@ class BaseCrawler:
     async def async_session(self):
         """Get or create an async session as needed within an async context."""
         if self._async_session is None or self._async_session.closed:
-            self._async_session = ClientSession(headers={"User-Agent": self.user_agent})
+            self._async_session = ClientSession(
+                headers={"User-Agent": self.user_agent},
+                trace_configs=self.trace_configs or None,
+            )
         return self._async_session
 
     def refresh_user_agent(self):
@@ -62,21 +80,217 @@ class BaseCrawler:
         try:
             response = self.session.get(url, headers={"User-Agent": self.user_agent})
             response.raise_for_status()
-            return response.text
+            # requests falls back to ISO-8859-1 for text/html without a charset,
+            # which garbles undeclared EUC-KR and GB2312 pages
+            return decode_html(
+                response.content, content_type=response.headers.get("Content-Type")
+            )
         except requests.RequestException as e:
             self.logger.error(f"Failed to fetch {url}: {e}")
             return None
 
     async def fetch_page_async(self, url):
         """Fetch a page asynchronously using aiohttp."""
+        _, text = await self.fetch_response_async(url)
+        return text
+
+    async def fetch_response_async(self, url, trace=None):
+        """
+        Fetch a page asynchronously and report the HTTP status alongside the body.
+
+        Args:
+            url (str): URL to fetch.
+            trace: Passed to the session's trace configs as trace_request_ctx.
+
+        Returns:
+            tuple: (status, text); status is None if no response was received and
+                text is None unless the request succeeded.
+        """
+        status, data, encoding = await self.fetch_bytes_async(url, trace=trace)
+        return status, None if data is None else decode_html(data, encoding)
+
+    async def fetch_bytes_async(self, url, trace=None):
+        """
+        Fetch a page asynchronously without decoding it.
+
+        Returns:
+            tuple: (status, body bytes, detected encoding); body and encoding
+                are None unless the request succeeded.
+        """
         session = await self.async_session
+        status = None
         try:
-            async with session.get(url) as response:
+            async with session.get(url, trace_request_ctx=trace) as response:
+                status = response.status
                 response.raise_for_status()
-                return await response.text()
+                data = await response.read()
+                encoding = detect_encoding(data, response.headers.get("Content-Type"))
+                return status, data, encoding
         except aiohttp.ClientError as e:
             self.logger.error(f"Failed to fetch {url} asynchronously: {e}")
-            return None
+            return status, None, None
+
+    def fetch_many(self, targets, **kwargs):
+        """
+        Fetch many pages and yield the results as they complete.
+
+        Synchronous wrapper around fetch_many_async that runs its own event
+        loop; inside a running loop (e.g. a notebook cell) iterate
+        fetch_many_async with "async for" instead.
+        """
+        loop = asyncio.new_event_loop()
+        results = self.fetch_many_async(targets, **kwargs)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.run_until_complete(self.close_async_session())
+            loop.close()
+
+    async def fetch_many_async(
+        self, targets, concurrency=None, retries=None, timeout=None, cache=False
+    ):
+        """
+        Fetch many pages concurrently and yield the results as they complete.
+
+        Requests are consumed lazily by a fixed pool of workers, and a worker
+        only takes the next request once its previous result has been handed
+        over, so neither side grows with the input. Concurrency per host
+        adapts below the given limit; 429, 5xx and network errors are retried
+        with exponential backoff.
+
+        Args:
+            targets (iterable): URLs, or dicts with "url" and optionally
+                "method", "params", "headers", "data" and "json". A "context"
+                key is not sent and comes back unchanged in the result's request.
+            concurrency (int): Maximum requests in flight.
+            retries (int): Retries per request; defaults to the crawler's retries.
+            timeout (float): Total seconds allowed for one attempt.
+            cache (bool): Serve repeated requests from an in-memory LRU cache.
+
+        Yields:
+            dict: url, status, text (None unless successful), error, elapsed
+                seconds, attempts, cached and the original request.
+        """
+        concurrency = concurrency or self.fetch_concurrency
+        limiter = AdaptiveLimiter(concurrency)
+        pending = iter(targets)
+        results = asyncio.Queue(maxsize=concurrency)
+        finished = object()
+
+        async def work():
+            try:
+                for request in pending:
+                    result = await self.fetch_one_async(
+                        request, limiter, retries, timeout, cache
+                    )
+                    await results.put(result)
+            except Exception as e:
+                await results.put(e)
+            finally:
+                await results.put(finished)
+
+        workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+        try:
+            remaining = len(workers)
+            while remaining:
+                result = await results.get()
+                if result is finished:
+                    remaining -= 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def fetch_one_async(
+        self, request, limiter, retries=None, timeout=None, cache=False
+    ):
+        """Fetch a single request of fetch_many_async. Never raises for HTTP errors."""
+        spec = {"url": request} if isinstance(request, str) else dict(request)
+        url = spec.pop("url")
+        method = spec.pop("method", "GET").upper()
+        spec.pop("context", None)
+        retries = self.retries if retries is None else retries
+        timeout = aiohttp.ClientTimeout(total=timeout or self.fetch_timeout)
+        result = {
+            "url": url,
+            "status": None,
+            "text": None,
+            "error": None,
+            "elapsed": 0.0,
+            "attempts": 0,
+            "cached": False,
+            "request": request,
+        }
+
+        cache_key = None
+        if cache:
+            cache_key = (method, url, json.dumps(spec, sort_keys=True, default=str))
+            cached = self.fetch_cache.get(cache_key)
+            if cached is not None:
+                self.fetch_cache.move_to_end(cache_key)
+                result.update(status=cached[0], text=cached[1], cached=True)
+                return result
+
+        session = await self.async_session
+        host = urlparse(url).netloc
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            result["attempts"] = attempt + 1
+            retry_after = None
+            try:
+                async with limiter.slot(host) as slot:
+                    async with session.request(
+                        method, url, timeout=timeout, **spec
+                    ) as response:
+                        result["status"] = response.status
+                        slot.record(response.status)
+                        if response.status == 429 or response.status >= 500:
+                            result["error"] = f"HTTP {response.status}"
+                            retry_after = response.headers.get("Retry-After")
+                        elif response.status >= 400:
+                            result["error"] = f"HTTP {response.status}"
+                            break
+                        else:
+                            result["text"] = decode_html(
+                                await response.read(),
+                                content_type=response.headers.get("Content-Type"),
+                            )
+                            result["error"] = None
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result["status"] = None
+                result["error"] = f"{type(e).__name__}: {e}"
+
+            if attempt < retries:
+                await asyncio.sleep(self.get_backoff(attempt, retry_after))
+
+        result["elapsed"] = time.perf_counter() - start
+        if result["error"]:
+            self.logger.error(
+                f"Failed to fetch {url} after {result['attempts']} attempts: "
+                f"{result['error']}"
+            )
+        elif cache_key is not None:
+            self.fetch_cache[cache_key] = (result["status"], result["text"])
+            if len(self.fetch_cache) > self.fetch_cache_size:
+                self.fetch_cache.popitem(last=False)
+        return result
+
+    def get_backoff(self, attempt, retry_after=None):
+        """Seconds to wait before a retry: Retry-After if given, else jittered exponential."""
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), self.max_backoff)
+        delay = min(self.backoff_factor**attempt * 0.5, self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
 
     def crawl(self):
         """Placeholder for the crawl method."""
@@ -1,13 +1,23 @@
 import asyncio
+import os
+import time
+from collections import Counter
+from itertools import chain, islice
+from urllib.parse import urlparse
 from tqdm import tqdm
 from src.crawler.spiders.BaseCrawler import BaseCrawler
+from src.crawler.utils.archive import ArchiveWriter, iter_index
 from src.crawler.utils.clean_html import clean_html
+from src.crawler.utils.compression import get_available_encodings
+from src.crawler.utils.concurrency import AdaptiveLimiter
+from src.crawler.utils.frontier import build_frontier
 from src.crawler.utils.files import (
-    load_json,
-    get_filepath,
+    iter_json_records,
     save_html_async,
-    get_resumable_urls,
+    is_resumable,
 )
+from src.crawler.utils.sitemap import LastmodStore
+from src.crawler.utils.tracing import Trace, TraceWriter, create_trace_config, span
 from src.crawler.utils.url import get_clean_url
 
 
@@ -16,72 +26,259 @@ class HTMLCrawler(BaseCrawler):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.targets = kwargs.get("targets")
+        # concurrency_limit is a hard cap; the per-host window adapts below it
         self.concurrency_limit = kwargs.get("concurrency_limit", 20)
-        self.semaphore = asyncio.Semaphore(self.concurrency_limit)
+        self.initial_concurrency = kwargs.get("initial_concurrency")
+        self.latency_tolerance = kwargs.get("latency_tolerance", 2.0)
+        # Created per crawl_async, as its locks belong to the running event loop
+        self.limiter = None
+        # Workers pull from a bounded queue, so memory does not grow with the input
+        self.num_workers = kwargs.get("num_workers", self.concurrency_limit)
+        self.queue_size = kwargs.get("queue_size", self.num_workers * 2)
+        self.collect_results = kwargs.get("collect_results", True)
+        self.max_segment_mb = kwargs.get("max_segment_mb", 1024)
+        # Uncompressed archives can be read zero-copy by MappedArchiveReader
+        self.archive_compress = kwargs.get("archive_compress", True)
+        # Encodings ("gzip", "br") stored next to each saved file for serving
+        self.precompress = get_available_encodings(kwargs.get("precompress", []))
+        self.archive = None
+        self.archived_urls = None
+        # SitemapExtractor's store, told which scheduled pages were fetched
+        self.lastmod_store = None
+        # Optional priority ordering of the targets, see build_frontier
+        self.frontier_config = kwargs.get("frontier")
+        self.frontier_batch_size = (self.frontier_config or {}).get("batch_size", 1000)
+        # Optional per-URL stage timings, written as JSON lines
+        self.trace_file = kwargs.get("trace_file")
+        self.trace_writer = None
+        if self.trace_file:
+            self.trace_configs.append(create_trace_config())
 
     def crawl(self):
         for target in self.targets:
-            self.xpath = target.get("xpath")
-            self.input_file = target.get("input_file")
-            self.file_key = target.get("file_key")
-            self.resumable = target.get("resumable", False)
-            target_urls = load_json(self.input_file)
-            max_depth = max([t.get("depth", 0) for t in target_urls])
-            target_urls = [t for t in target_urls if t.get("depth", 0) == max_depth]
-            if self.resumable:
-                resumable_target_urls = get_resumable_urls(
-                    [t["url"] for t in target_urls], self.file_key, self.output_dir
-                )
-                target_urls = [
-                    t for t in target_urls if t["url"] in resumable_target_urls
-                ]
-            if not target_urls:
+            self.set_target(target)
+            # First pass only counts depths, so the input is never held in memory
+            depth_counts = Counter(
+                t.get("depth", 0) for t in iter_json_records(self.input_file)
+            )
+            if not depth_counts:
+                self.logger.warning("No target_urls found in the input file.")
+                continue
+            max_depth = max(depth_counts)
+            target_urls = self.iter_target_urls(max_depth)
+            first_target = next(target_urls, None)
+            if first_target is None:
                 self.logger.warning("No target_urls found in the input file.")
                 continue
-            return asyncio.run(self.crawl_async(target_urls))
+            total = None if self.resumable else depth_counts[max_depth]
+            if target.get("lastmod_store"):
+                self.lastmod_store = LastmodStore(target["lastmod_store"])
+            try:
+                return asyncio.run(
+                    self.crawl_async(chain([first_target], target_urls), total=total)
+                )
+            finally:
+                self.close_archive()
+                self.close_lastmod_store()
 
-    async def crawl_async(self, targets):
-        results = []
-        tasks = []
+    def set_target(self, target):
+        self.xpath = target.get("xpath")
+        self.input_file = target.get("input_file")
+        self.file_key = target.get("file_key")
+        self.resumable = target.get("resumable", False)
+        self.storage = target.get("storage", "files")
 
-        try:
-            progress = tqdm(total=len(targets), desc="Crawling")
-            for target in targets:
-                task = asyncio.create_task(self.process_target_async(target, progress))
-                tasks.append(task)
+    def close_trace_writer(self):
+        if self.trace_writer:
+            self.trace_writer.close()
+            self.trace_writer = None
+
+    def close_archive(self):
+        if self.archive:
+            self.archive.close()
+            self.archive = None
+
+    def close_lastmod_store(self):
+        if self.lastmod_store:
+            self.lastmod_store.close()
+            self.lastmod_store = None
+
+    def iter_target_urls(self, max_depth):
+        """Stream the deepest targets from the input file, skipping saved pages."""
+        for target in iter_json_records(self.input_file):
+            if target.get("depth", 0) != max_depth:
+                continue
+            if self.resumable and self.is_saved(target["url"]):
+                continue
+            yield target
+
+    def is_saved(self, url):
+        if self.storage == "archive":
+            if self.archived_urls is None:
+                self.archived_urls = {entry[0] for entry in iter_index(self.output_dir)}
+            return get_clean_url(url) in self.archived_urls
+        return not is_resumable(url, self.file_key, self.output_dir)
+
+    async def save_page_async(self, html_content, clean_url):
+        """
+        Save a cleaned page, either as its own file or appended to the archive.
+
+        Returns:
+            dict: Where the page was stored.
+        """
+        if self.storage == "archive":
+            if self.archive is None:
+                self.archive = ArchiveWriter(
+                    self.output_dir,
+                    compress=self.archive_compress,
+                    max_segment_bytes=self.max_segment_mb << 20,
+                )
+            segment_name, offset = await asyncio.to_thread(
+                self.archive.write, clean_url, html_content
+            )
+            return {
+                "html": os.path.join(self.output_dir, segment_name),
+                "offset": offset,
+            }
+
+        file_path = await save_html_async(
+            html_content, clean_url, self.file_key, self.output_dir, self.precompress
+        )
+        return {"html": file_path}
 
-            for completed_task in asyncio.as_completed(tasks):
+    async def crawl_async(self, targets, total=None):
+        """
+        Crawl targets with a fixed pool of workers fed through a bounded queue.
+
+        Args:
+            targets (iterable): Target dicts with a "url" key; consumed lazily.
+            total (int): Number of targets, if known, for the progress bar.
+
+        Returns:
+            list: Results of the successful targets, or None if collect_results
+                is disabled.
+        """
+        results = [] if self.collect_results else None
+        self.limiter = AdaptiveLimiter(
+            self.concurrency_limit,
+            initial_limit=self.initial_concurrency,
+            latency_tolerance=self.latency_tolerance,
+        )
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        # Workers waiting for a target in frontier mode, see fill_from_frontier
+        idle_workers = asyncio.Semaphore(0)
+        progress = tqdm(total=total, desc="Crawling")
+
+        async def produce():
+            if self.frontier_config:
+                frontier = build_frontier(self.frontier_config)
+                try:
+                    await fill_from_frontier(frontier)
+                finally:
+                    frontier.close()
+            else:
+                for target in targets:
+                    await queue.put(target)
+            for _ in range(self.num_workers):
+                await queue.put(None)
+
+        async def fill_from_frontier(frontier):
+            # The input is read a batch at a time whenever fewer than a batch
+            # of URLs are queued, so workers start on the first batch and the
+            # frontier holds at most two batches however large the input is
+            remaining = iter(targets)
+            exhausted = False
+            while True:
+                if not exhausted and len(frontier) < self.frontier_batch_size:
+                    batch = list(islice(remaining, self.frontier_batch_size))
+                    exhausted = len(batch) < self.frontier_batch_size
+                    frontier.extend((target["url"], target) for target in batch)
+                    await asyncio.sleep(0)
+                if not frontier:
+                    return
+                # A URL is only popped once a worker is free to fetch it, so
+                # the politeness delay stamped by pop() holds for the request
+                # rather than for the time it was queued
+                await idle_workers.acquire()
+                item = frontier.pop()
+                if item is None:
+                    # Every queued host is waiting out its politeness delay
+                    idle_workers.release()
+                    await asyncio.sleep(frontier.next_ready_in())
+                    continue
+                await queue.put(item[1])
+
+        async def work():
+            while True:
+                if self.frontier_config:
+                    idle_workers.release()
+                target = await queue.get()
+                if target is None:
+                    return
                 try:
-                    result = await completed_task
-                    if result:
+                    result = await self.process_target_async(target, progress)
+                    if result and self.lastmod_store:
+                        self.lastmod_store.confirm(target["url"])
+                    if result and results is not None:
                         results.append(result)
                 except Exception as e:
                     self.logger.error(f"Error in async task: {str(e)}")
+
+        try:
+            workers = [asyncio.create_task(work()) for _ in range(self.num_workers)]
+            try:
+                await produce()
+                await asyncio.gather(*workers)
+            except BaseException:
+                for worker in workers:
+                    worker.cancel()
+                raise
             progress.close()
             return results
         finally:
             await self.close_async_session()
+            self.close_trace_writer()
 
     async def process_target_async(self, target, progress):
-        async with self.semaphore:
-            clean_url = get_clean_url(target["url"])
-            try:
-                html_text = await self.fetch_page_async(clean_url)
-                html_content = clean_html(html_text, self.xpath)
-                file_path = get_filepath(clean_url, self.file_key, self.output_dir)
-
-                await save_html_async(
-                    html_content, clean_url, self.file_key, self.output_dir
+        clean_url = get_clean_url(target["url"])
+        trace = None
+        if self.trace_file:
+            if self.trace_writer is None:
+                self.trace_writer = TraceWriter(self.trace_file)
+            trace = Trace(clean_url)
+        try:
+            # Only the request holds a slot so the limiter sees network latency
+            wait_start = time.perf_counter()
+            async with self.limiter.slot(urlparse(clean_url).netloc) as slot:
+                if trace:
+                    trace.add("slot_wait", time.perf_counter() - wait_start)
+                # The page stays bytes from the socket to the file
+                status, html_bytes, encoding = await self.fetch_bytes_async(
+                    clean_url, trace=trace
                 )
-                progress.update(1)
-                return {
-                    "url": clean_url,
-                    "html": file_path,
-                }
-
-            except Exception as e:
-                error_message = f"Error processing URL {clean_url}: {str(e)}"
-                self.logger.error(error_message)
-
-                progress.update(1)
-                return None
+                slot.record(status)
+            if trace:
+                trace.mark("fetched")
+                trace.status = status
+
+            with span(trace, "clean_html"):
+                html_content = clean_html(html_bytes, self.xpath, encoding=encoding)
+            with span(trace, "save"):
+                location = await self.save_page_async(html_content, clean_url)
+            progress.update(1)
+            return {
+                "url": clean_url,
+                **location,
+            }
+
+        except Exception as e:
+            error_message = f"Error processing URL {clean_url}: {str(e)}"
+            self.logger.error(error_message)
+            if trace:
+                trace.error = str(e)
+
+            progress.update(1)
+            return None
+        finally:
+            if trace:
+                self.trace_writer.write(trace)
@@ -1,8 +1,11 @@
+import logging
 from urllib.parse import urljoin
 import os
 import requests
 from src.crawler.utils.files import save_json
+from src.crawler.utils.records import ImageRecord
 from src.crawler.utils.url import construct_url
+from src.crawler.utils.xpath import select
 from tqdm import tqdm
 from src.crawler.spiders.BaseCrawler import BaseCrawler
 from lxml import html
@@ -20,6 +23,9 @@ class ImageExtractor(BaseCrawler):
     def fetch_page(self, url):
         """Override fetch_page to trace what's happening with the response."""
         response = super().fetch_page(url)
+        # Skip building the trace messages per page unless debug logging is on
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return response
         self.logger.debug(f"fetch_page returned type: {type(response)}")
         if response is not None:
             self.logger.debug(f"Response is of type: {type(response)}")
@@ -53,8 +59,7 @@ class ImageExtractor(BaseCrawler):
 
                 # Save all images
                 for img_data in images:
-                    img_data["source_url"] = input_url
-                    img_data["depth"] = depth
+                    img_data.depth = depth
                     results.append(img_data)
 
                     # Download and save the image if requested
@@ -78,7 +83,7 @@ class ImageExtractor(BaseCrawler):
 
             # Parse the HTML
             page = html.fromstring(html_content)
-            elements = page.xpath(xpath)
+            elements = select(page, xpath)
 
             self.logger.info(
                 f"Found {len(elements)} image elements with XPath '{xpath}'"
@@ -94,7 +99,7 @@ class ImageExtractor(BaseCrawler):
                         alt = element.get("alt", "")
                     # For elements containing imgs
                     else:
-                        img_elements = element.xpath(".//img")
+                        img_elements = select(element, ".//img")
                         if img_elements:
                             src = img_elements[0].get("src")
                             alt = img_elements[0].get("alt", "")
@@ -112,7 +117,7 @@ class ImageExtractor(BaseCrawler):
                     if not filename:
                         filename = f"image_{len(images)}.jpg"
 
-                    images.append({"url": full_url, "alt": alt, "filename": filename})
+                    images.append(ImageRecord(full_url, alt, filename, source_url=url))
                 except Exception as e:
                     self.logger.error(f"Error extracting image data: {e}")
 
@@ -134,8 +139,8 @@ class ImageExtractor(BaseCrawler):
 
             os.makedirs(output_dir, exist_ok=True)
 
-            img_url = img_data["url"]
-            filename = img_data["filename"]
+            img_url = img_data.url
+            filename = img_data.filename
             output_path = os.path.join(output_dir, filename)
 
             # Check if file already exists
@@ -155,5 +160,5 @@ class ImageExtractor(BaseCrawler):
             self.logger.info(f"Saved image: {output_path}")
             return True
         except Exception as e:
-            self.logger.error(f"Error saving image {img_data['url']}: {e}")
+            self.logger.error(f"Error saving image {img_data.url}: {e}")
             return False
@@ -0,0 +1,84 @@
+import asyncio
+import os
+from src.crawler.spiders.HTMLCrawler import HTMLCrawler
+from src.crawler.utils.files import iter_json_records
+from src.crawler.utils.freshness import FreshnessStore, fingerprint
+from src.crawler.utils.url import get_clean_url
+
+
+class RecrawlCrawler(HTMLCrawler):
+    """
+    Revisits known pages according to how often they change.
+
+    Every URL in the input files is registered in a freshness store. Each run
+    fetches at most fetch_budget pages, choosing those most likely to have
+    changed since their last visit, so frequently updated pages (section fronts)
+    are revisited often and static ones (archive days) rarely. Pages whose
+    cleaned content did not change are not written again.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.fetch_budget = kwargs.get("fetch_budget", 1000)
+        self.min_interval = kwargs.get("min_interval_hours", 1) * 60 * 60
+        max_interval_days = kwargs.get("max_interval_days")
+        self.max_interval = (
+            max_interval_days * 24 * 60 * 60 if max_interval_days else None
+        )
+        self.state_file = kwargs.get("state_file") or os.path.join(
+            self.output_dir, f"{kwargs.get('source_name', 'recrawl')}.freshness.sqlite"
+        )
+        self.store = None
+
+    def crawl(self):
+        self.store = FreshnessStore(self.state_file)
+        remaining = self.fetch_budget
+        results = []
+        try:
+            for target in self.targets:
+                if remaining <= 0:
+                    break
+                self.set_target(target)
+                added = self.store.add_urls(
+                    (
+                        get_clean_url(t["url"])
+                        for t in iter_json_records(self.input_file)
+                    ),
+                    self.input_file,
+                )
+                due_urls = self.store.select_due(
+                    self.input_file, remaining, self.min_interval, self.max_interval
+                )
+                self.logger.info(
+                    f"Registered {added} new URLs, {len(due_urls)} due for a visit"
+                )
+                if not due_urls:
+                    continue
+                remaining -= len(due_urls)
+
+                try:
+                    target_results = asyncio.run(
+                        self.crawl_async(
+                            ({"url": url} for url in due_urls), total=len(due_urls)
+                        )
+                    )
+                finally:
+                    self.close_archive()
+                    self.store.commit()
+
+                if target_results:
+                    changed = sum(1 for r in target_results if r["changed"])
+                    self.logger.info(
+                        f"{changed}/{len(target_results)} revisited pages changed"
+                    )
+                    results.extend(target_results)
+        finally:
+            self.store.close()
+        return results
+
+    async def save_page_async(self, html_content, clean_url):
+        """Record the page's fingerprint and only save it if the content changed."""
+        if not self.store.record_visit(clean_url, fingerprint(html_content)):
+            return {"html": None, "changed": False}
+        location = await super().save_page_async(html_content, clean_url)
+        return {**location, "changed": True}
@@ -0,0 +1,187 @@
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urljoin
+import requests
+import urllib3
+from lxml import etree
+from tqdm import tqdm
+from src.crawler.spiders.BaseCrawler import BaseCrawler
+from src.crawler.utils.robots import RobotsCache
+from src.crawler.utils.sitemap import (
+    LastmodStore,
+    iter_sitemap,
+    open_sitemap_stream,
+    parse_lastmod,
+)
+
+
+class SitemapExtractor(BaseCrawler):
+    """
+    Seeds HTMLCrawler from sitemaps and sitemap indexes.
+
+    Only pages that are new or whose lastmod changed since the previous run are
+    written to a JSON Lines file with the same fields as UrlExtractor output, so
+    it can be used directly as an HTMLCrawler input_file. Set that target's
+    lastmod_store to {output_dir}/{source_name}.lastmod.sqlite so pages whose
+    fetch failed are scheduled again on the next run.
+
+    robots.txt Crawl-delay only paces the sitemap requests made here;
+    HTMLCrawler paces page requests with its own adaptive limiter.
+    """
+
+    def __init__(
+        self,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.kwargs = kwargs
+        self.targets = kwargs.get("targets")
+        self.respect_robots = kwargs.get("respect_robots", True)
+        self.robots = RobotsCache(self.session, self.user_agent)
+        self.confirm_fetches = kwargs.get("confirm_fetches", True)
+
+    def crawl(self):
+        output_dir = Path(self.kwargs.get("output_dir"))
+        source_name = self.kwargs.get("source_name")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / f"{source_name}.jsonl"
+
+        store = LastmodStore(output_dir / f"{source_name}.lastmod.sqlite")
+        scheduled = 0
+        started_at = datetime.now(timezone.utc)
+        try:
+            with open(output_path, "w", encoding="utf-8") as output:
+                for target in self.targets:
+                    since = target.get("since")
+                    pattern = target.get("url_pattern")
+                    self.since = parse_lastmod(since) if since else None
+                    self.pattern = re.compile(pattern) if pattern else None
+
+                    for sitemap_url in self.get_sitemap_urls(target):
+                        count, _ = self.process_sitemap(sitemap_url, store, output)
+                        scheduled += count
+
+                # Pages from earlier runs whose fetch was never confirmed;
+                # their sitemaps may be unchanged and skipped above
+                retried = 0
+                for loc, lastmod in store.iter_pending(started_at):
+                    self.write_target(loc, lastmod, output)
+                    retried += 1
+                if retried:
+                    self.logger.info(f"Scheduled {retried} unconfirmed URLs again")
+                scheduled += retried
+        finally:
+            store.close()
+
+        self.logger.info(f"Scheduled {scheduled} changed URLs in {output_path}")
+        return str(output_path)
+
+    def get_sitemap_urls(self, target):
+        """Returns the target's sitemap URL or the ones listed in robots.txt."""
+        if target.get("sitemap_url"):
+            return [target["sitemap_url"]]
+        base_url = self.kwargs.get("base_url")
+        sitemap_urls = self.robots.site_maps(base_url)
+        if not sitemap_urls:
+            sitemap_urls = [urljoin(base_url, "/sitemap.xml")]
+        return sitemap_urls
+
+    def process_sitemap(self, sitemap_url, store, output, progress=None):
+        """
+        Stream a sitemap, recursing into changed child sitemaps of an index.
+
+        Returns:
+            tuple: (number of scheduled pages, whether the sitemap and all of
+                its children were read completely)
+        """
+        if self.respect_robots:
+            if not self.robots.can_fetch(sitemap_url):
+                self.logger.warning(f"Sitemap disallowed by robots.txt: {sitemap_url}")
+                return 0, False
+            self.robots.wait(sitemap_url)
+
+        close_progress = progress is None
+        if progress is None:
+            progress = tqdm(desc="Reading sitemaps", unit=" urls")
+
+        scheduled = 0
+        complete = True
+        try:
+            try:
+                with self.session.get(sitemap_url, stream=True, timeout=60) as response:
+                    response.raise_for_status()
+                    entries = iter_sitemap(open_sitemap_stream(response))
+                    child_sitemaps = []
+                    for kind, loc, lastmod in entries:
+                        if kind == "sitemap":
+                            # Children are read after this stream is closed
+                            child_sitemaps.append((loc, lastmod))
+                            continue
+                        progress.update(1)
+                        if self.should_schedule(loc, lastmod, store):
+                            self.schedule(loc, lastmod, store, output)
+                            scheduled += 1
+            except (
+                requests.RequestException,
+                urllib3.exceptions.HTTPError,
+                etree.XMLSyntaxError,
+                OSError,
+                EOFError,
+            ) as e:
+                # Connections dropped mid-stream and truncated or malformed
+                # sitemaps end up here too; pages read before the error stay
+                # scheduled
+                self.logger.error(f"Failed to read sitemap {sitemap_url}: {e}")
+                return scheduled, False
+
+            for loc, lastmod in child_sitemaps:
+                # Children without a lastmod have to be read every time
+                if lastmod is not None and not store.is_changed(loc, lastmod):
+                    self.logger.info(f"Skipping unchanged sitemap {loc}")
+                    continue
+                child_scheduled, child_complete = self.process_sitemap(
+                    loc, store, output, progress
+                )
+                scheduled += child_scheduled
+                if not child_complete:
+                    # Read again next run, and so is every index above it
+                    complete = False
+                    continue
+                # Only remember the child once all of its pages have been scheduled
+                store.update(loc, lastmod)
+                store.commit()
+            return scheduled, complete
+        finally:
+            if close_progress:
+                progress.close()
+
+    def schedule(self, loc, lastmod, store, output):
+        self.write_target(loc, lastmod, output)
+        # With confirm_fetches the page stays due until HTMLCrawler, given
+        # this store as its target's lastmod_store, confirms it was fetched
+        store.update(loc, lastmod, pending=self.confirm_fetches)
+
+    def write_target(self, loc, lastmod, output):
+        output.write(
+            json.dumps(
+                {
+                    "depth": 0,
+                    "url": loc,
+                    "path": "",
+                    "lastmod": lastmod.isoformat() if lastmod else None,
+                },
+                ensure_ascii=False,
+            )
+            + "\n"
+        )
+
+    def should_schedule(self, url, lastmod, store):
+        if self.pattern and not self.pattern.search(url):
+            return False
+        if self.since and lastmod and lastmod < self.since:
+            return False
+        if self.respect_robots and not self.robots.can_fetch(url):
+            return False
+        return store.is_changed(url, lastmod)
@@ -1,12 +1,31 @@
 from urllib.parse import urljoin
+import asyncio
+import hashlib
 import os
 import json
+from pathlib import Path
 from tqdm import tqdm
 from src.crawler.spiders.BaseCrawler import BaseCrawler
-from src.crawler.utils.files import save_json
+from src.crawler.utils.embedded_json import EmbeddedJson
+from src.crawler.utils.files import iter_json_records
+from src.crawler.utils.jsonpath import find
+from src.crawler.utils.records import TextRecord, save_records
+from src.crawler.utils.xpath import select
 from lxml import html
 
 
+def get_content_id(*parts):
+    """Stable ID derived from content, unlike the per-process randomised hash()."""
+    digest = hashlib.sha1(
+        json.dumps(parts, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    )
+    return digest.hexdigest()[:16]
+
+
+def is_field_target(target):
+    return bool(target.get("fields") or target.get("json_fields"))
+
+
 class TextExtractor(BaseCrawler):
     def __init__(
         self,
@@ -20,9 +39,22 @@ class TextExtractor(BaseCrawler):
         """Process each target and extract text content."""
         results = []
 
+        # Targets with a fields map are fetched concurrently and streamed out
+        field_targets = [
+            (depth, target)
+            for depth, target in enumerate(self.targets)
+            if is_field_target(target)
+        ]
+        if field_targets:
+            asyncio.run(self.extract_fields_async(field_targets))
+            if len(field_targets) == len(self.targets):
+                return results
+
         for depth, target in enumerate(
             tqdm(self.targets, desc="Processing text targets")
         ):
+            if is_field_target(target):
+                continue
             self.logger.info(f"Processing target {depth+1}/{len(self.targets)}")
 
             input_url = target.get("url")
@@ -37,15 +69,14 @@ class TextExtractor(BaseCrawler):
                 self.logger.info(f"Found {len(text_items)} text items from {input_url}")
 
                 for text_item in text_items:
-                    text_item["source_url"] = input_url
-                    text_item["depth"] = depth
+                    text_item.depth = depth
                     results.append(text_item)
 
             except Exception as e:
                 self.logger.error(f"Error processing target {input_url}: {e}")
 
         # Save all extracted text
-        save_json(
+        save_records(
             results,
             self.kwargs.get("output_dir"),
             self.kwargs.get("source_name"),
@@ -54,6 +85,135 @@ class TextExtractor(BaseCrawler):
 
         return results
 
+    def iter_field_requests(self, field_targets):
+        """Yield fetch_many requests for every URL of the field targets."""
+        for depth, target in field_targets:
+            context = {
+                "depth": depth,
+                "fields": target.get("fields"),
+                "json_fields": target.get("json_fields"),
+            }
+            input_file = target.get("input_file")
+            if input_file:
+                for record in iter_json_records(input_file):
+                    if "depth" in target and record.get("depth") != target["depth"]:
+                        continue
+                    yield {"url": record["url"], "context": context}
+            else:
+                yield {
+                    "url": target["url"],
+                    "params": target.get("params") or None,
+                    "context": context,
+                }
+
+    async def extract_fields_async(self, field_targets):
+        """
+        Fetch the pages of the field targets concurrently and stream one record
+        per page to {output_dir}/{source_name}.jsonl as pages arrive.
+
+        Returns:
+            int: Number of records written.
+        """
+        output_path = (
+            Path(self.kwargs.get("output_dir"))
+            / f"{self.kwargs.get('source_name')}.jsonl"
+        )
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+        progress = tqdm(desc="Extracting fields")
+        try:
+            with open(output_path, "w", encoding="utf-8") as f:
+                async for result in self.fetch_many_async(
+                    self.iter_field_requests(field_targets)
+                ):
+                    progress.update(1)
+                    if result["text"] is None:
+                        continue
+                    context = result["request"]["context"]
+                    try:
+                        # Parsing runs in a thread so fetches continue meanwhile
+                        values = await asyncio.to_thread(
+                            self.extract_fields,
+                            result["text"],
+                            context["fields"],
+                            context["json_fields"],
+                        )
+                    except Exception as e:
+                        self.logger.error(
+                            f"Error extracting fields from {result['url']}: {e}"
+                        )
+                        continue
+                    record = {
+                        "id": get_content_id(result["url"], values),
+                        "source_url": result["url"],
+                        "depth": context["depth"],
+                        **values,
+                    }
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+        finally:
+            progress.close()
+            await self.close_async_session()
+        self.logger.info(f"Wrote {count} records to {output_path}")
+        return count
+
+    def extract_fields(self, html_content, fields, json_fields=None):
+        """
+        Parse a page once and evaluate every field XPath against the same tree.
+
+        json_fields are JSONPaths into the JSON embedded in the page's scripts,
+        see extract_json_fields. Without XPath fields the page is not parsed
+        as HTML at all.
+
+        Returns:
+            dict: Field name to the text of its matches joined by newlines, or
+                None if nothing matched.
+        """
+        values = {}
+        if json_fields:
+            values.update(self.extract_json_fields(html_content, json_fields))
+        if not fields:
+            return values
+        page = html.fromstring(html_content)
+        for name, xpath in fields.items():
+            matches = select(page, xpath)
+            if not isinstance(matches, list):
+                matches = [matches]
+            texts = []
+            for match in matches:
+                if isinstance(match, str):
+                    text = match.strip()
+                elif hasattr(match, "text_content"):
+                    text = match.text_content().strip()
+                else:
+                    text = str(match)
+                if text:
+                    texts.append(text)
+            values[name] = "\n".join(texts) if texts else None
+        return values
+
+    def extract_json_fields(self, html_content, json_fields):
+        """
+        Evaluate JSONPaths against the JSON payloads embedded in a page.
+
+        The root of every path maps payload names to their data, e.g.
+        $.__NEXT_DATA__.props.pageProps.article.headline or
+        $['ld+json'][0].datePublished. Only the payloads a path reaches are
+        parsed.
+
+        Returns:
+            dict: Field name to the single match, a list of matches, or None.
+        """
+        payloads = EmbeddedJson(html_content)
+        values = {}
+        for name, path in json_fields.items():
+            matches = find(payloads, path)
+            if not matches:
+                values[name] = None
+            else:
+                values[name] = matches[0] if len(matches) == 1 else matches
+        return values
+
     def extract_text(self, url, xpath):
         """Extract text matching the XPath from the webpage."""
         try:
@@ -66,7 +226,7 @@ class TextExtractor(BaseCrawler):
 
             # Parse the HTML
             page = html.fromstring(html_content)
-            elements = page.xpath(xpath)
+            elements = select(page, xpath)
 
             self.logger.info(
                 f"Found {len(elements)} text elements with XPath '{xpath}'"
@@ -84,16 +244,18 @@ class TextExtractor(BaseCrawler):
                     # Get element attributes as metadata
                     attributes = {k: v for k, v in element.attrib.items()}
 
-                    # Create a unique ID for the text item
-                    item_id = f"text_{i}_{hash(text_content) % 10000}"
+                    # Same page, position and text give the same ID in every
+                    # run, and repeated texts on a page stay distinct
+                    item_id = f"text_{get_content_id(url, i, text_content)}"
 
                     text_items.append(
-                        {
-                            "id": item_id,
-                            "text": text_content,
-                            "attributes": attributes,
-                            "element_type": element.tag,
-                        }
+                        TextRecord(
+                            item_id,
+                            text_content,
+                            attributes,
+                            element.tag,
+                            source_url=url,
+                        )
                     )
 
                 except Exception as e:
@@ -1,6 +1,12 @@
+import logging
 from urllib.parse import urljoin
-from src.crawler.utils.files import save_json
+from pathlib import Path
+from src.crawler.utils.checkpoint import CrawlJournal
+from src.crawler.utils.records import UrlRecord, save_records
+from src.crawler.utils.frontier import build_frontier
+from src.crawler.utils.graph import LinkGraphBuilder
 from src.crawler.utils.url import construct_url
+from src.crawler.utils.xpath import select
 from tqdm import tqdm
 from src.crawler.spiders.BaseCrawler import BaseCrawler
 from lxml import html
@@ -14,10 +20,20 @@ class UrlExtractor(BaseCrawler):
         super().__init__(**kwargs)
         self.kwargs = kwargs
         self.targets = kwargs.get("targets")
+        self.graph = LinkGraphBuilder()
+        # Optional priority ordering of the URLs of each depth, see build_frontier
+        self.frontier_config = kwargs.get("frontier")
+        # Expanded pages are journaled so an interrupted crawl can resume
+        self.checkpoint = kwargs.get("checkpoint", True)
+        self.checkpoint_interval = kwargs.get("checkpoint_interval", 50)
+        self.journal = None
 
     def fetch_page(self, url):
         """Override fetch_page to trace what's happening with the response."""
         response = super().fetch_page(url)
+        # Skip building the trace messages per page unless debug logging is on
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return response
         self.logger.debug(f"fetch_page returned type: {type(response)}")
         if response is not None:
             self.logger.debug(f"Response is of type: {type(response)}")
@@ -35,83 +51,186 @@ class UrlExtractor(BaseCrawler):
         initial_url = construct_url(
             initial_target["url"], initial_target.get("params", {})
         )
-        current_urls = [{"url": initial_url, "text": "", "path": ""}]
-        last_level_urls = []
+        current_urls = [UrlRecord(initial_url)]
+        self.graph.add_node(initial_url)
+        last_level_start = 0
 
         result_urls = []
+        checkpoints = self.open_journal()
 
-        # Process each depth level
-        for depth, target in enumerate(
-            tqdm(self.targets, desc="Crawling depth levels")
-        ):
-            self.logger.info(f"Processing depth {depth+1}/{len(self.targets)}")
-            next_urls = self.process_depth(
-                current_urls, target["xpath"], depth, target.get("params", {})
-            )
+        try:
+            # Process each depth level
+            for depth, target in enumerate(
+                tqdm(self.targets, desc="Crawling depth levels")
+            ):
+                self.logger.info(f"Processing depth {depth+1}/{len(self.targets)}")
+                next_urls = self.process_depth(
+                    current_urls,
+                    target["xpath"],
+                    depth,
+                    target.get("params", {}),
+                    checkpoints.get(depth),
+                )
 
-            # Store URLs found at this depth level
-            last_level_urls = [
-                {"url": url["url"], "path": url["path"], "depth": depth}
-                for url in next_urls
-            ]
+                # The records of the last depth are the tail of result_urls, so
+                # they are not copied into a separate list while crawling
+                last_level_start = len(result_urls)
+                result_urls.extend(next_urls)
 
-            # Set up for the next depth
-            current_urls = next_urls
-            self.logger.info(f"Found {len(current_urls)} URLs to process at next depth")
-            for url in current_urls:
-                result_urls.append(
-                    {
-                        "depth": depth,
-                        "url": url["url"],
-                        "path": url["path"],
-                    }
+                # Set up for the next depth
+                current_urls = next_urls
+                self.logger.info(
+                    f"Found {len(current_urls)} URLs to process at next depth"
                 )
-            # If this is the last depth or no URLs were found, we're done
-            if depth == len(self.targets) - 1 or not next_urls:
-                break
-
-        save_json(
+                # If this is the last depth or no URLs were found, we're done
+                if depth == len(self.targets) - 1 or not next_urls:
+                    break
+        finally:
+            if self.journal:
+                self.journal.close()
+
+        save_records(
             result_urls,
             self.kwargs.get("output_dir"),
             self.kwargs.get("source_name"),
             filename=None,
         )
+        self.save_graph()
+        if self.journal:
+            # The results are saved, so there is nothing left to resume
+            self.journal.remove()
+            self.journal = None
+
+        # Callers get the same {"depth", "url", "path"} dicts as before records
+        return [record.to_dict() for record in result_urls[last_level_start:]]
+
+    def open_journal(self):
+        """
+        Open the checkpoint journal, resuming it if it belongs to this crawl.
+
+        Returns:
+            dict: Checkpointed pages and finished flag per depth, see CrawlJournal.load.
+        """
+        if not self.checkpoint:
+            return {}
+        journal_path = (
+            Path(self.kwargs.get("output_dir"))
+            / f"{self.kwargs.get('source_name')}.checkpoint.jsonl"
+        )
+        self.journal = CrawlJournal(
+            journal_path,
+            {"targets": self.targets},
+            sync_interval=self.checkpoint_interval,
+        )
+        checkpoints = self.journal.load()
+        self.journal.open(resume=bool(checkpoints))
+        if checkpoints:
+            pages = sum(len(state["pages"]) for state in checkpoints.values())
+            self.logger.info(
+                f"Resuming from {journal_path}: {pages} pages already expanded"
+            )
+        return checkpoints
+
+    def save_graph(self):
+        """Save every parent to child link seen during the crawl as a CSR graph."""
+        graph = self.graph.build()
+        graph_path = (
+            Path(self.kwargs.get("output_dir"))
+            / f"{self.kwargs.get('source_name')}.graph.npz"
+        )
+        graph.save(graph_path)
+        self.logger.info(
+            f"Saved link graph with {len(graph)} URLs and {graph.num_edges} links to {graph_path}"
+        )
 
-        return last_level_urls
-
-    def process_depth(self, current_urls, xpath, depth, params):
+    def process_depth(self, current_urls, xpath, depth, params, checkpoint=None):
         next_urls = []
+        seen = set()
+
+        # Links of pages expanded before an interruption are replayed from the
+        # checkpoint instead of being fetched again
+        expanded = set()
+        if checkpoint:
+            for page in checkpoint["pages"]:
+                expanded.add(page["url"])
+                self.add_links(
+                    page["url"], page["path"], page["links"], depth, next_urls, seen
+                )
+            if checkpoint["done"]:
+                return next_urls
+            current_urls = [
+                url_data for url_data in current_urls if url_data.url not in expanded
+            ]
+            self.logger.info(
+                f"Replayed {len(expanded)} pages at depth {depth+1}, "
+                f"{len(current_urls)} left"
+            )
 
         # Process all URLs at the current depth
         for url_data in tqdm(
-            current_urls, desc=f"Processing URLs at depth {depth+1}", leave=False
+            self.order_urls(current_urls, depth),
+            total=len(current_urls),
+            desc=f"Processing URLs at depth {depth+1}",
+            leave=False,
         ):
 
             try:
-                extracted_elements = self.extract_url_elements(url_data["url"], xpath)
+                extracted_elements = self.extract_url_elements(url_data.url, xpath)
+                if extracted_elements is None:
+                    # Not journaled, so a resumed crawl tries the page again
+                    continue
 
+                links = []
                 for element in extracted_elements:
 
                     # Convert relative URLs to absolute
-                    joined_url = urljoin(url_data["url"], element["url"])
-                    full_url = construct_url(joined_url, params)
-
-                    current_text = element["text"]
+                    joined_url = urljoin(url_data.url, element["url"])
+                    links.append([construct_url(joined_url, params), element["text"]])
 
-                    # Build the navigation path
-                    new_path = self.build_path(url_data["path"], current_text)
-
-                    # Add to next_urls if not a duplicate
-                    if not any(item["url"] == full_url for item in next_urls):
-                        next_urls.append(
-                            {"url": full_url, "text": current_text, "path": new_path}
-                        )
+                if self.journal:
+                    self.journal.add_page(depth, url_data.url, url_data.path, links)
+                self.add_links(
+                    url_data.url, url_data.path, links, depth, next_urls, seen
+                )
             except Exception as e:
 
-                self.logger.error(f"Error processing {url_data['url']}: {e}")
+                self.logger.error(f"Error processing {url_data.url}: {e}")
 
+        if self.journal:
+            self.journal.complete_depth(depth)
         return next_urls
 
+    def add_links(self, parent_url, parent_path, links, depth, next_urls, seen):
+        """Record the links of one page in the graph and the next depth's URLs."""
+        for full_url, current_text in links:
+            self.graph.add_edge(parent_url, full_url)
+
+            # Build the navigation path
+            new_path = self.build_path(parent_path, current_text)
+
+            # Add to next_urls if not a duplicate
+            if full_url not in seen:
+                seen.add(full_url)
+                next_urls.append(UrlRecord(full_url, new_path, depth, current_text))
+
+    def order_urls(self, current_urls, depth):
+        """Yield the URLs of a depth in frontier order, or as found if unset."""
+        if not self.frontier_config:
+            yield from current_urls
+            return
+        frontier = build_frontier(self.frontier_config)
+        try:
+            # Frontier data must be JSON serialisable in case it spills to disk
+            frontier.extend(
+                (url_data.url, {**url_data.to_dict(), "text": url_data.text})
+                for url_data in current_urls
+            )
+            while frontier:
+                _, url_data = frontier.get()
+                yield UrlRecord(**url_data)
+        finally:
+            frontier.close()
+
     def extract_url_elements(self, url, xpath):
         try:
             # Get the HTML content as a string
@@ -119,7 +238,7 @@ class UrlExtractor(BaseCrawler):
 
             if html_content is None:
                 self.logger.error(f"Failed to fetch {url}")
-                return []
+                return None
 
             # Ensure html_content is a string
             if not isinstance(html_content, str):
@@ -137,11 +256,11 @@ class UrlExtractor(BaseCrawler):
                 improved_xpath = xpath.replace(
                     "contains(text(), 'China')", "contains(., 'China')"
                 )
-                elements = page.xpath(improved_xpath)
+                elements = select(page, improved_xpath)
                 self.logger.info(f"Using improved XPath: '{improved_xpath}'")
                 self.logger.info(f"Found {len(elements)} elements")
             else:
-                elements = page.xpath(xpath)
+                elements = select(page, xpath)
                 self.logger.info(f"Using original XPath: '{xpath}'")
                 self.logger.info(f"Found {len(elements)} elements")
 
@@ -170,7 +289,7 @@ class UrlExtractor(BaseCrawler):
             import traceback
 
             self.logger.error(traceback.format_exc())
-            return []
+            return None
 
     def build_path(self, parent_path, current_text):
 
@@ -0,0 +1,296 @@
+import gzip
+import os
+import threading
+import uuid
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+SEGMENT_PREFIX = "segment-"
+INDEX_SUFFIX = ".idx"
+RECORD_END = b"\r\n\r\n"
+# Last gzip member of every compressed record, see ArchiveWriter
+GZIP_RECORD_END = gzip.compress(RECORD_END, mtime=0)
+
+
+def get_segment_name(number, compress):
+    return f"{SEGMENT_PREFIX}{number:05d}.warc{'.gz' if compress else ''}"
+
+
+def get_segment_number(segment_path):
+    return int(Path(segment_path).name[len(SEGMENT_PREFIX) :].split(".")[0])
+
+
+def get_index_path(segment_path):
+    return Path(f"{segment_path}{INDEX_SUFFIX}")
+
+
+def escape_url(url):
+    """URLs are stored in a tab separated index, so tabs and newlines are encoded."""
+    return url.replace("\t", "%09").replace("\n", "%0A").replace("\r", "%0D")
+
+
+def build_record(url, payload, content_type):
+    """
+    Build a WARC/1.0 resource record.
+
+    Returns:
+        tuple: (record bytes, length of the header block in bytes)
+    """
+    date = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    header = (
+        "WARC/1.0\r\n"
+        "WARC-Type: resource\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {date}\r\n"
+        f"WARC-Target-URI: {escape_url(url)}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "\r\n"
+    ).encode("utf-8")
+    return header + payload + RECORD_END, len(header)
+
+
+def get_payload_member(record):
+    """
+    Split a compressed record into its header and the gzip member of its page.
+
+    Returns:
+        tuple: (decompressed header bytes, page member), or None for records
+            gzipped as a whole by earlier versions.
+    """
+    if bytes(record[-len(GZIP_RECORD_END) :]) != GZIP_RECORD_END:
+        return None
+    # Only the small header member is decompressed
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    header = b""
+    fed = 0
+    while not decompressor.eof and fed < len(record):
+        header += decompressor.decompress(record[fed : fed + 1024])
+        fed = min(fed + 1024, len(record))
+    if not decompressor.eof:
+        return None
+    start = fed - len(decompressor.unused_data)
+    return header, record[start : len(record) - len(GZIP_RECORD_END)]
+
+
+class ArchiveWriter:
+    """
+    Append-only writer for segmented WARC-style archives.
+
+    Each page is stored as one record, individually gzipped when compress is
+    enabled so any record can be decompressed on its own. A compressed record
+    is three gzip members, for the header, the page and the closing CRLFs:
+    it still decompresses as one record, and the page member can be sent to
+    clients as-is with Content-Encoding: gzip. Every segment has a
+    sidecar index with one line per record:
+    url, offset, length, payload offset and payload length, separated by tabs.
+    Offsets point into the segment file; the payload offset is relative to the
+    start of the decompressed record.
+
+    Index lines are held back until the segment has been fsynced, every
+    sync_interval records, so an index on disk never points at record bytes
+    that may not have reached it. A crash loses at most the index lines of
+    the records since the last sync, which are then fetched again.
+
+    Args:
+        archive_dir (str): Directory holding the segments and their indexes.
+        compress (bool): Gzip each record.
+        max_segment_bytes (int): Size after which a new segment is started.
+        compression_level (int): Gzip compression level.
+        sync_interval (int): Records between segment fsyncs.
+    """
+
+    def __init__(
+        self,
+        archive_dir,
+        compress=True,
+        max_segment_bytes=1024 * 1024 * 1024,
+        compression_level=6,
+        sync_interval=1000,
+    ):
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.compress = compress
+        self.max_segment_bytes = max_segment_bytes
+        self.compression_level = compression_level
+        self.sync_interval = sync_interval
+        self.pending_index = []
+        self.lock = threading.Lock()
+
+        # Continue the last segment of a previous run rather than starting a new one
+        existing = [
+            path
+            for path in self.archive_dir.glob(f"{SEGMENT_PREFIX}*")
+            if not path.name.endswith(INDEX_SUFFIX)
+        ]
+        self.segment_number = max(map(get_segment_number, existing), default=0)
+        self.segment_file = None
+        self.index_file = None
+        self._open_segment()
+
+    def _open_segment(self):
+        segment_path = self.archive_dir / get_segment_name(
+            self.segment_number, self.compress
+        )
+        self.segment_name = segment_path.name
+        self.segment_file = open(segment_path, "ab")
+        self.index_file = open(get_index_path(segment_path), "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._write_index()
+        self.segment_file.close()
+        self.index_file.close()
+        self.segment_number += 1
+        self._open_segment()
+
+    def write(self, url, content, content_type="text/html; charset=utf-8"):
+        """
+        Append a page to the archive. Safe to call from several threads.
+
+        Returns:
+            tuple: (segment name, offset) of the written record.
+        """
+        payload = content.encode("utf-8") if isinstance(content, str) else content
+        record, payload_offset = build_record(url, payload, content_type)
+        if self.compress:
+            # Compress outside the lock so writer threads only serialise on I/O
+            level = self.compression_level
+            record = (
+                gzip.compress(record[:payload_offset], compresslevel=level)
+                + gzip.compress(payload, compresslevel=level)
+                + GZIP_RECORD_END
+            )
+
+        with self.lock:
+            offset = self.segment_file.tell()
+            if offset and offset + len(record) > self.max_segment_bytes:
+                self._rotate()
+                offset = 0
+            self.segment_file.write(record)
+            self.pending_index.append(
+                f"{escape_url(url)}\t{offset}\t{len(record)}"
+                f"\t{payload_offset}\t{len(payload)}\n"
+            )
+            if len(self.pending_index) >= self.sync_interval:
+                self._write_index()
+            return self.segment_name, offset
+
+    def _write_index(self):
+        """Make the pending records durable, then write their index lines."""
+        if not self.pending_index:
+            return
+        self.segment_file.flush()
+        os.fsync(self.segment_file.fileno())
+        self.index_file.write("".join(self.pending_index))
+        self.index_file.flush()
+        self.pending_index = []
+
+    def flush(self, sync=False):
+        with self.lock:
+            self._write_index()
+            if sync:
+                os.fsync(self.index_file.fileno())
+
+    def close(self):
+        self.flush(sync=True)
+        self.segment_file.close()
+        self.index_file.close()
+
+
+def iter_index(archive_dir):
+    """
+    Yield index entries of all segments in write order.
+
+    Yields:
+        tuple: (url, segment name, offset, length, payload offset, payload length)
+    """
+    for index_path in sorted(
+        Path(archive_dir).glob(f"{SEGMENT_PREFIX}*{INDEX_SUFFIX}")
+    ):
+        segment_name = index_path.name[: -len(INDEX_SUFFIX)]
+        try:
+            segment_size = (index_path.parent / segment_name).stat().st_size
+        except FileNotFoundError:
+            continue
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) != 5:
+                    # Incomplete last line from an interrupted run
+                    continue
+                url, offset, length, payload_offset, payload_length = fields
+                if int(offset) + int(length) > segment_size:
+                    # Written by a crashed run before its record reached disk
+                    continue
+                yield (
+                    url,
+                    segment_name,
+                    int(offset),
+                    int(length),
+                    int(payload_offset),
+                    int(payload_length),
+                )
+
+
+class ArchiveReader:
+    """
+    Random-access reader for archives written by ArchiveWriter.
+
+    The sidecar indexes are loaded once; reading a page is a single seek and
+    read in its segment, without touching per-page file metadata. When a URL
+    was written more than once the latest record wins.
+    """
+
+    def __init__(self, archive_dir):
+        self.archive_dir = Path(archive_dir)
+        self.index = {entry[0]: entry[1:] for entry in iter_index(self.archive_dir)}
+        self.files = {}
+
+    def __contains__(self, url):
+        return escape_url(url) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def urls(self):
+        return self.index.keys()
+
+    def _read_record(self, segment_name, offset, length):
+        segment_file = self.files.get(segment_name)
+        if segment_file is None:
+            segment_file = self.files[segment_name] = open(
+                self.archive_dir / segment_name, "rb"
+            )
+        segment_file.seek(offset)
+        record = segment_file.read(length)
+        if segment_name.endswith(".gz"):
+            record = gzip.decompress(record)
+        return record
+
+    def get_bytes(self, url):
+        """Returns the stored payload of a URL as bytes, or None if it is missing."""
+        entry = self.index.get(escape_url(url))
+        if entry is None:
+            return None
+        segment_name, offset, length, payload_offset, payload_length = entry
+        record = self._read_record(segment_name, offset, length)
+        return record[payload_offset : payload_offset + payload_length]
+
+    def get(self, url):
+        """Returns the stored page of a URL as text, or None if it is missing."""
+        payload = self.get_bytes(url)
+        return payload.decode("utf-8") if payload is not None else None
+
+    def __iter__(self):
+        """Yield (url, text) for every stored page in segment order."""
+        for url, segment_name, offset, length, *_ in iter_index(self.archive_dir):
+            if self.index.get(url, (None, None))[:2] != (segment_name, offset):
+                continue
+            yield url, self.get(url)
+
+    def close(self):
+        for segment_file in self.files.values():
+            segment_file.close()
+        self.files = {}
@@ -0,0 +1,107 @@
+import json
+import os
+from pathlib import Path
+
+
+class CrawlJournal:
+    """
+    Append-only checkpoint of a multi-depth crawl.
+
+    The first line identifies the crawl, so a journal left by a crawl with
+    other targets is not resumed. After that there is one line per expanded
+    page with the links found on it, and one line per finished depth:
+
+        {"crawl": {...}}
+        {"depth": 0, "url": "...", "path": "...", "links": [[url, text], ...]}
+        {"depth": 0, "done": true}
+
+    Lines are flushed to disk every sync_interval pages and at the end of
+    each depth. A line cut short by a crash is ignored when loading, so at
+    most the pages since the last sync are fetched again.
+
+    Args:
+        journal_path (str): Journal file.
+        crawl_key (dict): JSON serialisable description of the crawl.
+        sync_interval (int): Pages written between two fsyncs.
+    """
+
+    def __init__(self, journal_path, crawl_key, sync_interval=50):
+        self.journal_path = Path(journal_path)
+        self.crawl_key = crawl_key
+        self.sync_interval = max(sync_interval, 1)
+        self.pending = 0
+        self.file = None
+        # End of the last complete line found by load()
+        self.valid_size = 0
+
+    def load(self):
+        """
+        Read the journal of an interrupted run of the same crawl.
+
+        Returns:
+            dict: Depth to {"pages": [entry, ...], "done": bool}; empty when
+                there is nothing to resume.
+        """
+        if not self.journal_path.exists():
+            return {}
+        depths = {}
+        with open(self.journal_path, "rb") as f:
+            try:
+                header = json.loads(f.readline())
+            except json.JSONDecodeError:
+                return {}
+            if header.get("crawl") != self.crawl_key:
+                return {}
+            self.valid_size = f.tell()
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Torn last line of a crash
+                    break
+                entry = json.loads(line)
+                state = depths.setdefault(entry["depth"], {"pages": [], "done": False})
+                if entry.get("done"):
+                    state["done"] = True
+                else:
+                    state["pages"].append(entry)
+                self.valid_size += len(line)
+        return depths
+
+    def open(self, resume):
+        """Start appending, keeping the loaded entries when resuming."""
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            self.file = open(self.journal_path, "a", encoding="utf-8")
+            # Drop a torn line so new entries start on a line of their own
+            self.file.truncate(self.valid_size)
+            return
+        self.file = open(self.journal_path, "w", encoding="utf-8")
+        self._write({"crawl": self.crawl_key})
+        self.sync()
+
+    def _write(self, entry):
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def add_page(self, depth, url, path, links):
+        self._write({"depth": depth, "url": url, "path": path, "links": links})
+        self.pending += 1
+        if self.pending >= self.sync_interval:
+            self.sync()
+
+    def complete_depth(self, depth):
+        self._write({"depth": depth, "done": True})
+        self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+    def remove(self):
+        self.close()
+        self.journal_path.unlink(missing_ok=True)
@@ -1,5 +1,22 @@
+from functools import lru_cache
 from lxml import etree
 import re
+from src.crawler.utils.xpath import select
+
+
+EVENT_HANDLERS = [
+    "onclick",
+    "onload",
+    "onunload",
+    "onchange",
+    "onsubmit",
+    "onfocus",
+    "onblur",
+]
+
+EVENT_HANDLER_XPATH = (
+    "//*[" + " or ".join([f"@{handler}" for handler in EVENT_HANDLERS]) + "]"
+)
 
 
 def clean_html(
@@ -9,12 +26,17 @@ def clean_html(
     remove_styles=True,
     pretty=True,
     remove_whitespace=True,
+    encoding=None,
 ):
+    """
+    Keep the xpath target (or the body) of a page without scripts and styles.
 
+    A str page returns a str. A bytes page is parsed straight from its bytes
+    in the given encoding and returns UTF-8 bytes, so the page is never
+    decoded to a str or re-encoded along the way.
+    """
     try:
-        # Parse the HTML
-        parser = etree.HTMLParser(remove_blank_text=True)
-        original_tree = etree.HTML(html_page, parser)
+        original_tree = parse_html(html_page, encoding)
 
         # Apply HTML cleaning operations
         remove_unwanted_elements(original_tree, remove_scripts, remove_styles)
@@ -24,49 +46,70 @@ def clean_html(
         new_doc = create_clean_document(original_tree, xpath)
 
         # Format and clean the document
-        result = format_document(new_doc, pretty, remove_whitespace)
+        result = format_document(
+            new_doc, pretty, remove_whitespace, as_bytes=isinstance(html_page, bytes)
+        )
 
         return result
 
     except Exception as e:
-        return html_page  # Return original if cleaning fails
+        # Return original if cleaning fails
+        if isinstance(html_page, bytes):
+            return html_page.decode(encoding or "utf-8", errors="replace").encode(
+                "utf-8"
+            )
+        return html_page
+
+
+def parse_html(html_page, encoding=None):
+    if not isinstance(html_page, bytes):
+        return etree.HTML(html_page, etree.HTMLParser(remove_blank_text=True))
+    # libxml2 skips a UTF-8 byte order mark itself but does not know utf-8-sig
+    if encoding == "utf-8-sig":
+        encoding = "utf-8"
+    try:
+        parser = etree.HTMLParser(remove_blank_text=True, encoding=encoding)
+    except LookupError:
+        # A codec Python has but libxml2 does not
+        return parse_html(html_page.decode(encoding, errors="replace"))
+    return etree.HTML(html_page, parser)
+
+
+@lru_cache(maxsize=None)
+def get_pattern(pattern, as_bytes):
+    return re.compile(pattern.encode("ascii") if as_bytes else pattern)
+
+
+def sub(pattern, replacement, html_str):
+    """re.sub that works on both str and UTF-8 bytes documents."""
+    as_bytes = isinstance(html_str, bytes)
+    if as_bytes:
+        replacement = replacement.encode("ascii")
+    return get_pattern(pattern, as_bytes).sub(replacement, html_str)
 
 
 def remove_unwanted_elements(tree, remove_scripts, remove_styles):
     """Remove script and style elements from the tree."""
     if remove_scripts:
-        for script in tree.xpath("//script"):
+        for script in select(tree, "//script"):
             if script.getparent() is not None:
                 script.getparent().remove(script)
 
     if remove_styles:
-        for style in tree.xpath("//style"):
+        for style in select(tree, "//style"):
             if style.getparent() is not None:
                 style.getparent().remove(style)
 
         # Also remove all link tags for CSS
-        for link in tree.xpath("//link[@rel='stylesheet']"):
+        for link in select(tree, "//link[@rel='stylesheet']"):
             if link.getparent() is not None:
                 link.getparent().remove(link)
 
 
 def remove_event_handlers(tree):
     """Remove all event handlers and inline scripts."""
-    event_handlers = [
-        "onclick",
-        "onload",
-        "onunload",
-        "onchange",
-        "onsubmit",
-        "onfocus",
-        "onblur",
-    ]
-
-    xpath_query = (
-        "//*[" + " or ".join([f"@{handler}" for handler in event_handlers]) + "]"
-    )
-    for element in tree.xpath(xpath_query):
-        for attr_name in event_handlers:
+    for element in select(tree, EVENT_HANDLER_XPATH):
+        for attr_name in EVENT_HANDLERS:
             if attr_name in element.attrib:
                 del element.attrib[attr_name]
 
@@ -78,7 +121,7 @@ def create_clean_document(original_tree, xpath):
 
     # Extract target element if xpath is provided
     if xpath:
-        elements = original_tree.xpath(xpath)
+        elements = select(original_tree, xpath)
         if elements and len(elements) > 0:
             target_element = elements[0]
             clean_text_nodes(target_element)
@@ -88,7 +131,7 @@ def create_clean_document(original_tree, xpath):
             return new_doc
     else:
         # If no xpath or match, just use the body content
-        body_elements = original_tree.xpath("//body/*")
+        body_elements = select(original_tree, "//body/*")
         for element in body_elements:
             new_body.append(element)
 
@@ -97,7 +140,7 @@ def create_clean_document(original_tree, xpath):
 
 def clean_text_nodes(element, remove_whitespace=True):
     """Clean up text nodes in the target element."""
-    for text_node in element.xpath(".//text()"):
+    for text_node in select(element, ".//text()"):
         parent = text_node.getparent()
         if parent is not None:
             text = text_node.strip() if remove_whitespace else text_node
@@ -110,24 +153,25 @@ def clean_text_nodes(element, remove_whitespace=True):
                         break
 
 
-def format_document(doc, pretty, remove_whitespace):
+def format_document(doc, pretty, remove_whitespace, as_bytes=False):
     """Format and clean the document according to specified preferences."""
-    doctype = "<!DOCTYPE html>"
+    doctype = b"<!DOCTYPE html>"
 
     # Special handling for pretty printing
     if pretty:
         # First convert to string
-        html_str = etree.tostring(doc, encoding="utf-8", pretty_print=True).decode(
-            "utf-8"
-        )
+        html_str = etree.tostring(doc, encoding="utf-8", pretty_print=True)
         # Replace XML self-closing tags with HTML tags
-        html_str = re.sub(r"<([^>]+)/>", r"<\1></\1>", html_str)
+        html_str = sub(r"<([^>]+)/>", r"<\1></\1>", html_str)
         # Add doctype
-        result = f"{doctype}\n{html_str}"
+        result = doctype + b"\n" + html_str
     else:
         # Minimal output without pretty printing
-        html_str = etree.tostring(doc, encoding="utf-8", method="html").decode("utf-8")
-        result = f"{doctype}{html_str}"
+        html_str = etree.tostring(doc, encoding="utf-8", method="html")
+        result = doctype + html_str
+
+    if not as_bytes:
+        result = result.decode("utf-8")
 
     # Apply whitespace cleanup if requested
     if remove_whitespace:
@@ -137,17 +181,20 @@ def format_document(doc, pretty, remove_whitespace):
 
 
 def clean_whitespace(html_str, pretty):
-    """Remove excess whitespace from HTML string."""
+    """
+    Remove excess whitespace from an HTML str or UTF-8 bytes. On bytes only
+    ASCII whitespace is matched, so non-breaking spaces are kept.
+    """
     # Remove carriage returns
-    html_str = html_str.replace("&#13;", "")
+    html_str = sub(r"&#13;", "", html_str)
     # Remove excessive newlines
-    html_str = re.sub(r"\n{2,}", "\n", html_str)
+    html_str = sub(r"\n{2,}", "\n", html_str)
     # Remove spaces at the end of lines
-    html_str = re.sub(r" +\n", "\n", html_str)
+    html_str = sub(r" +\n", "\n", html_str)
 
     if not pretty:
         # Additional cleanup for non-pretty mode
-        html_str = re.sub(r">\s+<", "><", html_str)
-        html_str = re.sub(r"\s{2,}", " ", html_str)
+        html_str = sub(r">\s+<", "><", html_str)
+        html_str = sub(r"\s{2,}", " ", html_str)
 
     return html_str
@@ -0,0 +1,83 @@
+import gzip
+import logging
+import os
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Content-Encoding token to the file suffix aiohttp's FileResponse looks for
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+logger = logging.getLogger(__name__)
+
+
+def get_available_encodings(encodings):
+    """Drop encodings whose compressor is not installed."""
+    available = []
+    for encoding in encodings:
+        if encoding not in SUFFIXES:
+            raise ValueError(f"Unknown encoding: {encoding}")
+        if encoding == "br" and brotli is None:
+            logger.warning("brotli is not installed, skipping .br files")
+            continue
+        available.append(encoding)
+    return available
+
+
+def compress(data, encoding):
+    if encoding == "gzip":
+        # mtime=0 keeps the output identical for identical pages
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+def write_precompressed(file_path, data, encodings):
+    """
+    Store compressed copies of a file next to it, e.g. page.html.gz and page.html.br.
+
+    A copy that is not smaller than the original is removed instead, so the
+    server falls back to the uncompressed file.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    for encoding in encodings:
+        compressed_path = Path(f"{file_path}{SUFFIXES[encoding]}")
+        compressed = compress(data, encoding)
+        if len(compressed) >= len(data):
+            compressed_path.unlink(missing_ok=True)
+            continue
+        tmp_path = compressed_path.with_name(f"{compressed_path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, compressed_path)
+
+
+def precompress_directory(directory, encodings=("gzip", "br"), pattern="*.html"):
+    """
+    Add compressed copies to pages saved before precompression was enabled.
+
+    Pages whose copies are newer than the page itself are skipped.
+
+    Returns:
+        int: Number of pages compressed.
+    """
+    encodings = get_available_encodings(encodings)
+    count = 0
+    for path in Path(directory).glob(pattern):
+        mtime = path.stat().st_mtime
+        missing = [
+            encoding
+            for encoding in encodings
+            if not (
+                (copy := Path(f"{path}{SUFFIXES[encoding]}")).exists()
+                and copy.stat().st_mtime >= mtime
+            )
+        ]
+        if missing:
+            write_precompressed(path, path.read_bytes(), missing)
+            count += 1
+    return count
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+
+class HostState:
+    """Concurrency window and latency baseline for a single host."""
+
+    def __init__(self, limit):
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.base_latency = None
+        self.last_decrease = 0.0
+        self.slow_start = True
+        self.condition = asyncio.Condition()
+
+
+class Slot:
+    """Handed to the caller of AdaptiveLimiter.slot to report the response status."""
+
+    def __init__(self):
+        self.status = None
+
+    def record(self, status):
+        self.status = status
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter with a window per host and a global hard cap.
+
+    Each host starts with a small window that grows by one request per success
+    (slow start) until the first congestion signal, then by one request per
+    window. A failed request, a 429/5xx response, or a latency above
+    latency_tolerance times the host's best observed latency shrinks the window
+    by decrease_factor, at most once per observed round trip.
+    """
+
+    def __init__(
+        self,
+        max_limit,
+        initial_limit=None,
+        min_limit=1,
+        decrease_factor=0.5,
+        latency_tolerance=2.0,
+    ):
+        self.max_limit = max_limit
+        self.initial_limit = initial_limit or max(min_limit, max_limit // 4)
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.semaphore = asyncio.Semaphore(max_limit)
+        self.hosts = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get_limit(self, host):
+        """Returns the current concurrency window for a host."""
+        state = self.hosts.get(host)
+        return int(state.limit) if state else self.initial_limit
+
+    @asynccontextmanager
+    async def slot(self, host):
+        """Wait for a free slot for the host and release it with the observed outcome."""
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(
+                min(self.initial_limit, self.max_limit)
+            )
+
+        async with state.condition:
+            await state.condition.wait_for(lambda: state.in_flight < int(state.limit))
+            state.in_flight += 1
+
+        slot = Slot()
+        start = time.monotonic()
+        try:
+            async with self.semaphore:
+                start = time.monotonic()
+                yield slot
+        except Exception:
+            slot.status = None
+            raise
+        finally:
+            latency = time.monotonic() - start
+            async with state.condition:
+                state.in_flight -= 1
+                self._update(host, state, slot.status, latency)
+                state.condition.notify_all()
+
+    def _update(self, host, state, status, latency):
+        now = time.monotonic()
+        failed = status is None or status == 429 or status >= 500
+
+        if not failed:
+            if state.base_latency is None or latency < state.base_latency:
+                state.base_latency = latency
+            else:
+                # Let the baseline drift up slowly so a host that got slower can recover
+                state.base_latency += 0.01 * (latency - state.base_latency)
+
+        congested = failed or latency > self.latency_tolerance * state.base_latency
+        if congested:
+            # Only back off once per round trip, otherwise a burst of failures
+            # from one window would collapse the limit to the minimum
+            if now - state.last_decrease < (state.base_latency or latency):
+                return
+            state.last_decrease = now
+            state.slow_start = False
+            state.limit = max(self.min_limit, state.limit * self.decrease_factor)
+            self.logger.debug(
+                f"Decreased limit for {host} to {int(state.limit)} "
+                f"(status={status}, latency={latency:.3f}s)"
+            )
+        elif state.slow_start:
+            state.limit = min(self.max_limit, state.limit + 1)
+        else:
+            state.limit = min(self.max_limit, state.limit + 1 / state.limit)
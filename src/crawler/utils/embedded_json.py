@@ -0,0 +1,132 @@
+import html
+import json
+import re
+from collections.abc import Mapping
+from src.crawler.utils.encoding import decode_html
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Scripts are found with a scan of the raw page rather than a DOM parse
+SCRIPT = re.compile(
+    r"<script\b(?P<attrs>[^>]*)>(?P<body>.*?)</script\s*>", re.IGNORECASE | re.DOTALL
+)
+ATTRIBUTE = re.compile(
+    r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE
+)
+JSON_TYPES = {"application/json", "application/ld+json"}
+# window.__APOLLO_STATE__ = {...}; and similar state assignments
+ASSIGNMENT = re.compile(
+    r"^\s*(?:(?:window|self|globalThis)\s*\.\s*|(?:var|let|const)\s+)?"
+    r"(?P<name>[A-Za-z_$][\w$]*)\s*=\s*(?=[\[{])"
+)
+LD_JSON = "ld+json"
+
+_decoder = json.JSONDecoder()
+
+
+def loads(text):
+    """Parse JSON with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def get_attributes(attrs):
+    return {
+        match.group(1).lower(): html.unescape(
+            next(value for value in match.groups()[1:] if value is not None)
+        )
+        for match in ATTRIBUTE.finditer(attrs)
+    }
+
+
+def find_json_scripts(page):
+    """
+    Find the JSON payloads embedded in a page's scripts, without parsing them.
+
+    A JSON script is named by its id, e.g. __NEXT_DATA__; a script assigning
+    an object or array to a global, e.g. window.__APOLLO_STATE__ = {...}, by
+    the global's name. JSON-LD scripts are collected under "ld+json".
+
+    Returns:
+        dict: Name to a (text, start offset) pair, or a list of such pairs
+            for "ld+json".
+    """
+    if isinstance(page, bytes):
+        page = decode_html(page)
+    payloads = {}
+    for script in SCRIPT.finditer(page):
+        body = script.group("body")
+        if not body.strip():
+            continue
+        attributes = get_attributes(script.group("attrs"))
+        script_type = attributes.get("type", "").split(";")[0].strip().lower()
+        if script_type == "application/ld+json":
+            payloads.setdefault(LD_JSON, []).append((body, 0))
+        elif script_type in JSON_TYPES:
+            name = attributes.get("id")
+            if name:
+                payloads.setdefault(name, (body, 0))
+        elif script_type in ("", "text/javascript", "module"):
+            assignment = ASSIGNMENT.match(body)
+            if assignment:
+                payloads.setdefault(assignment.group("name"), (body, assignment.end()))
+    return payloads
+
+
+def parse_payload(text, start):
+    if start == 0:
+        return loads(text)
+    try:
+        # Usually the assignment is the whole script
+        return loads(text[start:].rstrip().rstrip(";"))
+    except ValueError:
+        # The value may be followed by more statements
+        value, _ = _decoder.raw_decode(text, start)
+        return value
+
+
+def parse_ld_json(payload):
+    try:
+        return parse_payload(*payload)
+    except ValueError:
+        return None
+
+
+class EmbeddedJson(Mapping):
+    """
+    The JSON payloads of a page by name, parsed on first access.
+
+    Pages often embed several large blobs; only the ones a JSONPath actually
+    reaches are parsed. A payload that is not valid JSON reads as None.
+    """
+
+    def __init__(self, page):
+        self.payloads = find_json_scripts(page)
+        self.parsed = {}
+
+    def __getitem__(self, name):
+        if name not in self.parsed:
+            payload = self.payloads[name]
+            try:
+                if name == LD_JSON:
+                    self.parsed[name] = [
+                        value
+                        for value in map(parse_ld_json, payload)
+                        if value is not None
+                    ]
+                else:
+                    self.parsed[name] = parse_payload(*payload)
+            except ValueError:
+                self.parsed[name] = None
+        return self.parsed[name]
+
+    def __iter__(self):
+        return iter(self.payloads)
+
+    def __len__(self):
+        return len(self.payloads)
@@ -0,0 +1,111 @@
+import codecs
+import re
+
+
+# Labels that pages declare but that mean a superset in practice, as browsers
+# treat them. EUC-KR pages use UHC (cp949) characters and GB2312 pages use
+# GBK/GB18030 characters; decoding with the narrower codec garbles them.
+ENCODING_ALIASES = {
+    "euc-kr": "cp949",
+    "euc_kr": "cp949",
+    "ks_c_5601-1987": "cp949",
+    "ksc5601": "cp949",
+    "x-windows-949": "cp949",
+    "gb2312": "gb18030",
+    "gb_2312-80": "gb18030",
+    "gbk": "gb18030",
+    "x-gbk": "gb18030",
+    "iso-8859-1": "cp1252",
+    "latin1": "cp1252",
+    "us-ascii": "cp1252",
+    "ascii": "cp1252",
+}
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+# Browsers look for a meta charset in the first 1024 bytes
+META_SNIFF_BYTES = 1024
+META_CHARSET = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_:.\-]+)""", re.IGNORECASE
+)
+HEADER_CHARSET = re.compile(r"""charset\s*=\s*["']?\s*([^\s;"']+)""", re.IGNORECASE)
+
+
+def normalize_encoding(label):
+    """Python codec name for a charset label, or None if it is unknown."""
+    if not label:
+        return None
+    label = label.strip().lower()
+    label = ENCODING_ALIASES.get(label, label)
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+
+def get_header_encoding(content_type):
+    """Charset of a Content-Type header value, or None."""
+    if not content_type:
+        return None
+    match = HEADER_CHARSET.search(content_type)
+    return normalize_encoding(match.group(1)) if match else None
+
+
+def get_meta_encoding(data):
+    """Charset declared by a <meta> tag near the start of the page, or None."""
+    match = META_CHARSET.search(data[:META_SNIFF_BYTES])
+    if not match:
+        return None
+    encoding = normalize_encoding(match.group(1).decode("ascii"))
+    # A page that could be read to find its meta tag is not UTF-16
+    return "utf-8" if encoding and encoding.startswith("utf-16") else encoding
+
+
+def guess_encoding(data, default="utf-8"):
+    """Guess the encoding of an undeclared page from its bytes."""
+    try:
+        data.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        from charset_normalizer import from_bytes
+    except ImportError:
+        return default
+    match = from_bytes(data).best()
+    if match is None:
+        return default
+    return normalize_encoding(match.encoding) or default
+
+
+def detect_encoding(data, content_type=None, default="utf-8"):
+    """
+    Encoding of a fetched page, in the order browsers use: byte order mark,
+    Content-Type header, <meta> declaration, then a guess from the bytes.
+
+    Args:
+        data (bytes): Raw response body.
+        content_type (str): Content-Type header of the response.
+        default (str): Encoding used when nothing else applies.
+
+    Returns:
+        str: A Python codec name.
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding
+    return (
+        get_header_encoding(content_type)
+        or get_meta_encoding(data)
+        or guess_encoding(data, default)
+    )
+
+
+def decode_html(data, encoding=None, content_type=None):
+    """Decode a page to text, detecting the encoding unless it is given."""
+    encoding = encoding or detect_encoding(data, content_type)
+    return data.decode(encoding, errors="replace")
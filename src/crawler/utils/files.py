@@ -4,6 +4,7 @@ import re
 import os
 from urllib.parse import urlparse, parse_qs
 import asyncio
+from src.crawler.utils.compression import write_precompressed
 
 
 def save_json(data, directory, source_name, filename=None):
@@ -24,6 +25,60 @@ def load_json(file_path):
         return json.load(f)
 
 
+def iter_json_records(file_path, chunk_size=1 << 16):
+    """
+    Stream records from a JSON array or JSON Lines file without loading it whole.
+
+    Args:
+        file_path (str): Path to a .json file holding an array of objects, or a
+            .jsonl file with one object per line.
+        chunk_size (int): Number of characters read from disk at a time.
+
+    Yields:
+        dict: One record at a time.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        if str(file_path).endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buffer = ""
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != "[":
+                        raise ValueError(f"Expected a JSON array in {file_path}")
+                    started = True
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    pos = end
+                    yield record
+                    continue
+            elif eof:
+                return
+            # Keep only the unparsed tail so memory stays bounded by one record
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
 def get_filepath(url, file_key, output_dir):
 
     parsed_url = urlparse(url)
@@ -37,26 +92,34 @@ def get_filepath(url, file_key, output_dir):
     return os.path.join(output_dir, f"{file_name}.html")
 
 
-async def save_html_async(html, url, file_key, output_dir):
+async def save_html_async(html, url, file_key, output_dir, precompress=()):
 
     try:
         file_path = get_filepath(url, file_key, output_dir)
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        await asyncio.to_thread(write_file, file_path, html)
+        await asyncio.to_thread(write_file, file_path, html, precompress)
         return file_path
 
     except Exception as e:
         raise e
 
 
-def write_file(file_path, content):
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(content)
+def write_file(file_path, content, precompress=()):
+    # Cleaned pages arrive as UTF-8 bytes and are written as they are
+    if isinstance(content, bytes):
+        with open(file_path, "wb") as f:
+            f.write(content)
+    else:
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+    if precompress:
+        # Compressed copies are written once here so serving never compresses
+        write_precompressed(file_path, content, precompress)
 
 
 def get_resumable_urls(target_urls, file_key, output_dir):
-    return [
-        url
-        for url in target_urls
-        if not os.path.exists(get_filepath(url, file_key, output_dir))
-    ]
+    return [url for url in target_urls if is_resumable(url, file_key, output_dir)]
+
+
+def is_resumable(url, file_key, output_dir):
+    return not os.path.exists(get_filepath(url, file_key, output_dir))
@@ -0,0 +1,333 @@
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlparse
+
+
+READY = "ready"
+WAITING = "waiting"
+
+
+class Frontier:
+    """
+    Priority queue of URLs with per-host sub-queues and politeness delays.
+
+    Every host has its own heap ordered by score. A host is either ready, in
+    which case its best URL competes in a global heap, or waiting until its
+    politeness delay has passed. pop() therefore returns the highest scoring
+    URL among the hosts that may be contacted now.
+
+    When more than max_in_memory URLs are queued, the lower scoring half is
+    spilled to a SQLite file and loaded back, best first, once the in-memory
+    part runs low. URLs above the best spilled score stay in memory, so the
+    order is preserved across spills.
+
+    Args:
+        score (callable): score(url, data) -> float, higher is crawled first.
+        politeness (float): Minimum seconds between two URLs of the same host.
+        max_in_memory (int): Number of queued URLs kept in memory.
+        spill_dir (str): Directory of the spill file; the system temp dir if None.
+        resources (list): Objects the score functions read from, closed with
+            the frontier.
+    """
+
+    def __init__(
+        self,
+        score=None,
+        politeness=0.0,
+        max_in_memory=100_000,
+        spill_dir=None,
+        resources=None,
+    ):
+        self.score = score or (lambda url, data: 0.0)
+        self.resources = resources or []
+        self.politeness = politeness
+        self.max_in_memory = max(max_in_memory, 2)
+        self.spill_path = Path(spill_dir or tempfile.gettempdir()) / (
+            f"frontier-{uuid.uuid4().hex}.sqlite"
+        )
+        self.spill = None
+        self.spilled = 0
+        self.spill_threshold = None
+
+        self.queues = {}
+        self.states = {}
+        self.next_allowed = {}
+        self.ready = []
+        self.waiting = []
+        self.in_memory = 0
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return self.in_memory + self.spilled
+
+    def push(self, url, data=None, now=None):
+        score = self.score(url, data)
+        if self.spilled and score <= self.spill_threshold:
+            self._spill_entries([(score, url, data)])
+            return
+        self._push_memory(-score, url, data, now or time.monotonic())
+        if self.in_memory > self.max_in_memory:
+            self._spill_half()
+
+    def extend(self, items):
+        """Push (url, data) pairs."""
+        for url, data in items:
+            self.push(url, data)
+
+    def pop(self, now=None):
+        """
+        Returns the best (url, data) whose host may be contacted now, or None
+        if the frontier is empty or every queued host is still waiting.
+        """
+        now = now or time.monotonic()
+        if self.spilled and self.in_memory <= self.max_in_memory // 4:
+            self._load()
+        self._release(now)
+        while self.ready:
+            neg_score, _, host = heapq.heappop(self.ready)
+            queue = self.queues.get(host)
+            # Entries are left behind when a host gets a better URL or waits
+            if self.states.get(host) != READY or queue[0][0] != neg_score:
+                continue
+            _, _, url, data = heapq.heappop(queue)
+            self.in_memory -= 1
+            self.next_allowed[host] = now + self.politeness
+            if queue:
+                self._schedule(host, now)
+            else:
+                del self.queues[host]
+                del self.states[host]
+            return url, data
+        return None
+
+    def next_ready_in(self, now=None):
+        """Seconds until pop() can return a URL, assuming nothing new is pushed."""
+        now = now or time.monotonic()
+        if self.ready or not self.waiting:
+            return 0.0
+        return max(self.waiting[0][0] - now, 0.0)
+
+    def get(self):
+        """Blocking pop that sleeps through politeness delays. None once empty."""
+        while self:
+            item = self.pop()
+            if item is not None:
+                return item
+            time.sleep(self.next_ready_in())
+        return None
+
+    async def get_async(self):
+        """Same as get() without blocking the event loop."""
+        while self:
+            item = self.pop()
+            if item is not None:
+                return item
+            await asyncio.sleep(self.next_ready_in())
+        return None
+
+    def _push_memory(self, neg_score, url, data, now):
+        host = urlparse(url).netloc
+        queue = self.queues.setdefault(host, [])
+        heapq.heappush(queue, (neg_score, next(self.counter), url, data))
+        self.in_memory += 1
+        state = self.states.get(host)
+        if state is None:
+            self._schedule(host, now)
+        elif state == READY and queue[0][0] == neg_score:
+            heapq.heappush(self.ready, (neg_score, next(self.counter), host))
+
+    def _schedule(self, host, now):
+        next_allowed = self.next_allowed.get(host, 0.0)
+        if next_allowed <= now:
+            self.states[host] = READY
+            heapq.heappush(
+                self.ready, (self.queues[host][0][0], next(self.counter), host)
+            )
+        else:
+            self.states[host] = WAITING
+            heapq.heappush(self.waiting, (next_allowed, host))
+
+    def _release(self, now):
+        while self.waiting and self.waiting[0][0] <= now:
+            _, host = heapq.heappop(self.waiting)
+            if host in self.queues:
+                self._schedule(host, now)
+
+    def _spill_half(self):
+        entries = sorted(entry for queue in self.queues.values() for entry in queue)
+        keep = self.max_in_memory // 2
+        self._spill_entries(
+            (-neg_score, url, data) for neg_score, _, url, data in entries[keep:]
+        )
+        self._rebuild(entries[:keep])
+
+    def _rebuild(self, entries):
+        now = time.monotonic()
+        self.queues = {}
+        self.states = {}
+        self.ready = []
+        self.waiting = []
+        self.in_memory = 0
+        for neg_score, _, url, data in entries:
+            self._push_memory(neg_score, url, data, now)
+
+    def _spill_entries(self, entries):
+        if self.spill is None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self.spill = sqlite3.connect(self.spill_path)
+            self.spill.execute(
+                "CREATE TABLE IF NOT EXISTS frontier (score REAL, url TEXT, data TEXT)"
+            )
+            self.spill.execute("CREATE INDEX IF NOT EXISTS score ON frontier (score)")
+        rows = [(score, url, json.dumps(data)) for score, url, data in entries]
+        if not rows:
+            return
+        self.spill.executemany("INSERT INTO frontier VALUES (?, ?, ?)", rows)
+        self.spilled += len(rows)
+        best = max(row[0] for row in rows)
+        if self.spill_threshold is None or best > self.spill_threshold:
+            self.spill_threshold = best
+
+    def _load(self):
+        rows = self.spill.execute(
+            "SELECT rowid, score, url, data FROM frontier "
+            "ORDER BY score DESC, rowid LIMIT ?",
+            (self.max_in_memory // 2,),
+        ).fetchall()
+        self.spill.executemany(
+            "DELETE FROM frontier WHERE rowid = ?", [(row[0],) for row in rows]
+        )
+        self.spilled -= len(rows)
+        self.spill_threshold = (
+            self.spill.execute("SELECT MAX(score) FROM frontier").fetchone()[0]
+            if self.spilled
+            else None
+        )
+        now = time.monotonic()
+        for _, score, url, data in rows:
+            self._push_memory(-score, url, json.loads(data), now)
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+            os.remove(self.spill_path)
+        for resource in self.resources:
+            resource.close()
+        self.resources = []
+
+
+def depth_score(url, data):
+    """Shallower pages first."""
+    return -(data or {}).get("depth", 0)
+
+
+def anchor_text_score(keywords):
+    """Counts the keywords found in the anchor text or navigation path."""
+    keywords = [keyword.lower() for keyword in keywords]
+
+    def score(url, data):
+        data = data or {}
+        text = f"{data.get('text', '')} {data.get('path', '')}".lower()
+        return sum(keyword in text for keyword in keywords)
+
+    return score
+
+
+def in_degree_score(graph):
+    """Log of the number of distinct pages linking to the URL in a LinkGraph."""
+    in_degree = graph.in_degree()
+
+    def score(url, data):
+        url_id = graph.table.get_id(url)
+        return math.log1p(in_degree[url_id]) if url_id is not None else 0.0
+
+    return score
+
+
+def pagerank_score(graph, **kwargs):
+    """PageRank scaled so that the average page scores 1."""
+    ranks = graph.pagerank(**kwargs) * len(graph)
+
+    def score(url, data):
+        url_id = graph.table.get_id(url)
+        return float(ranks[url_id]) if url_id is not None else 0.0
+
+    return score
+
+
+def freshness_score(store, min_interval=0, max_interval=None):
+    """Probability that the page changed since it was last fetched."""
+
+    def score(url, data):
+        return store.get_url_priority(url, time.time(), min_interval, max_interval)
+
+    return score
+
+
+def combine_scores(weighted_scores):
+    """Weighted sum of (weight, score function) pairs."""
+
+    def score(url, data):
+        return sum(weight * fn(url, data) for weight, fn in weighted_scores)
+
+    return score
+
+
+def build_frontier(config):
+    """
+    Build a Frontier from the "frontier" option of a source.
+
+    Example:
+        {
+            "score": [
+                {"type": "anchor_text", "keywords": ["China"], "weight": 2},
+                {"type": "in_degree", "graph_file": "data/scmp/urls.graph.npz"}
+            ],
+            "politeness_seconds": 1.0,
+            "max_in_memory": 100000
+        }
+    """
+    weighted_scores = []
+    resources = []
+    for spec in config.get("score", []):
+        kind = spec["type"]
+        if kind == "depth":
+            fn = depth_score
+        elif kind == "anchor_text":
+            fn = anchor_text_score(spec.get("keywords", []))
+        elif kind in ("in_degree", "pagerank"):
+            from src.crawler.utils.graph import LinkGraph
+
+            graph = LinkGraph.load(spec["graph_file"])
+            fn = (
+                in_degree_score(graph) if kind == "in_degree" else pagerank_score(graph)
+            )
+        elif kind == "freshness":
+            from src.crawler.utils.freshness import FreshnessStore
+
+            store = FreshnessStore(spec["state_file"])
+            resources.append(store)
+            fn = freshness_score(
+                store, min_interval=spec.get("min_interval_hours", 0) * 3600
+            )
+        else:
+            raise ValueError(f"Unknown frontier score type: {kind}")
+        weighted_scores.append((spec.get("weight", 1.0), fn))
+
+    return Frontier(
+        score=combine_scores(weighted_scores) if weighted_scores else None,
+        politeness=config.get("politeness_seconds", 0.0),
+        max_in_memory=config.get("max_in_memory", 100_000),
+        spill_dir=config.get("spill_dir"),
+        resources=resources,
+    )
@@ -0,0 +1,200 @@
+from array import array
+from pathlib import Path
+import numpy as np
+from scipy import sparse
+
+
+class UrlTable:
+    """Interns URLs as dense integer IDs in discovery order."""
+
+    def __init__(self, urls=None):
+        self.urls = []
+        self.ids = {}
+        for url in urls or []:
+            self.intern(url)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __contains__(self, url):
+        return url in self.ids
+
+    def intern(self, url):
+        url_id = self.ids.get(url)
+        if url_id is None:
+            url_id = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+        return url_id
+
+    def get_id(self, url):
+        return self.ids.get(url)
+
+    def get_url(self, url_id):
+        return self.urls[url_id]
+
+    def to_bytes(self):
+        # Stored as one newline separated buffer instead of a fixed-width string array
+        return np.frombuffer("\n".join(self.urls).encode("utf-8"), dtype=np.uint8)
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        text = buffer.tobytes().decode("utf-8")
+        return cls(text.split("\n") if text else [])
+
+
+class LinkGraphBuilder:
+    """
+    Collects parent to child links as two compact uint32 edge arrays.
+
+    Each edge costs 8 bytes regardless of URL length; URLs are stored once in
+    the UrlTable.
+    """
+
+    def __init__(self):
+        self.table = UrlTable()
+        self.sources = array("I")
+        self.targets = array("I")
+
+    def __len__(self):
+        return len(self.sources)
+
+    def add_node(self, url):
+        return self.table.intern(url)
+
+    def add_edge(self, source_url, target_url):
+        self.sources.append(self.table.intern(source_url))
+        self.targets.append(self.table.intern(target_url))
+
+    def build(self):
+        """Returns a LinkGraph in CSR form with duplicate edges merged."""
+        n = len(self.table)
+        sources = np.frombuffer(self.sources, dtype=np.uint32)
+        targets = np.frombuffer(self.targets, dtype=np.uint32)
+        matrix = sparse.csr_matrix(
+            (np.ones(len(sources), dtype=np.float32), (sources, targets)),
+            shape=(n, n),
+        )
+        matrix.sum_duplicates()
+        matrix.data[:] = 1
+        return LinkGraph(self.table, matrix.indptr, matrix.indices)
+
+
+class LinkGraph:
+    """
+    Directed link graph with CSR adjacency: the children of node i are
+    indices[indptr[i]:indptr[i + 1]].
+
+    Args:
+        table (UrlTable): URL of every node ID.
+        indptr (np.ndarray): Row offsets, length n + 1.
+        indices (np.ndarray): Child IDs of every row, concatenated.
+    """
+
+    def __init__(self, table, indptr, indices):
+        self.table = table
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        n = len(table)
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(self.indices), dtype=np.float64), self.indices, self.indptr),
+            shape=(n, n),
+        )
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def children(self, url):
+        url_id = self.table.get_id(url)
+        if url_id is None:
+            return []
+        start, end = self.indptr[url_id], self.indptr[url_id + 1]
+        return [self.table.get_url(i) for i in self.indices[start:end]]
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def in_degree(self):
+        return np.bincount(self.indices, minlength=len(self))
+
+    def pagerank(self, damping=0.85, tol=1e-8, max_iter=100):
+        """
+        PageRank by power iteration on the sparse adjacency matrix.
+
+        Rank held by pages without outgoing links is spread uniformly, so the
+        scores always sum to one.
+
+        Returns:
+            np.ndarray: Score of every node ID.
+        """
+        n = len(self)
+        if n == 0:
+            return np.zeros(0)
+        out_degree = self.out_degree().astype(np.float64)
+        dangling = out_degree == 0
+        inverse_degree = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+        transition = (sparse.diags(inverse_degree) @ self.matrix).T.tocsr()
+
+        scores = np.full(n, 1.0 / n)
+        for _ in range(max_iter):
+            spread = (damping * scores[dangling].sum() + 1 - damping) / n
+            updated = damping * (transition @ scores) + spread
+            delta = np.abs(updated - scores).sum()
+            scores = updated
+            if delta < tol:
+                break
+        return scores
+
+    def reachable(self, urls, max_depth=None):
+        """
+        Breadth-first search from a set of URLs over the outgoing links.
+
+        Returns:
+            np.ndarray: Boolean mask of the node IDs reachable from the URLs,
+                including the URLs themselves.
+        """
+        visited = np.zeros(len(self), dtype=bool)
+        ids = [self.table.get_id(url) for url in urls]
+        visited[[i for i in ids if i is not None]] = True
+        frontier = visited.copy()
+        transposed = self.matrix.T.tocsr()
+        depth = 0
+        while frontier.any() and (max_depth is None or depth < max_depth):
+            frontier = (transposed @ frontier.astype(np.float64)) > 0
+            frontier &= ~visited
+            visited |= frontier
+            depth += 1
+        return visited
+
+    def reachable_urls(self, urls, max_depth=None):
+        mask = self.reachable(urls, max_depth)
+        return [self.table.get_url(i) for i in np.flatnonzero(mask)]
+
+    def top(self, scores, n=10):
+        """Returns the n URLs with the highest scores as (url, score) pairs."""
+        n = min(n, len(scores))
+        if n == 0:
+            return []
+        best = np.argpartition(-scores, n - 1)[:n]
+        best = best[np.argsort(-scores[best])]
+        return [(self.table.get_url(i), float(scores[i])) for i in best]
+
+    def save(self, file_path):
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            file_path,
+            urls=self.table.to_bytes(),
+            indptr=self.indptr,
+            indices=self.indices,
+        )
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as data:
+            return cls(
+                UrlTable.from_bytes(data["urls"]), data["indptr"], data["indices"]
+            )
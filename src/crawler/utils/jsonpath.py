@@ -0,0 +1,108 @@
+import re
+from collections.abc import Mapping
+from functools import lru_cache
+
+
+# One step of a path: .name, ..name, .*, ..*, [n], [start:end], [*] or ['name']
+STEP = re.compile(
+    r"""
+    (?P<descent>\.\.)?
+    (?:
+        \.?(?P<name>[A-Za-z_$][\w$-]*|\*)
+      | \[\s*(?:
+            (?P<index>-?\d+)
+          | (?P<slice>-?\d*\s*:\s*-?\d*)
+          | (?P<wildcard>\*)
+          | (?P<quote>['"])(?P<key>.*?)(?P=quote)
+        )\s*\]
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+@lru_cache(maxsize=1024)
+def compile_jsonpath(expression):
+    """
+    Parse a JSONPath into steps, shared across all pages.
+
+    Supports the subset used to pick fields out of embedded page data: the
+    root $, child names (.name or ['name']), array indexes and slices,
+    wildcards (.* and [*]) and recursive descent (..name).
+
+    Returns:
+        tuple: (recursive, kind, value) steps, kind being "key", "index",
+            "slice" or "all".
+    """
+    path = expression.strip()
+    if not path.startswith("$"):
+        raise ValueError(f"JSONPath must start with $: {expression}")
+    steps = []
+    position = 1
+    while position < len(path):
+        match = STEP.match(path, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Invalid JSONPath at {path[position:]!r}: {expression}")
+        recursive = match.group("descent") is not None
+        if match.group("name") == "*" or match.group("wildcard"):
+            steps.append((recursive, "all", None))
+        elif match.group("name") is not None:
+            steps.append((recursive, "key", match.group("name")))
+        elif match.group("key") is not None:
+            steps.append((recursive, "key", match.group("key")))
+        elif match.group("index") is not None:
+            steps.append((recursive, "index", int(match.group("index"))))
+        else:
+            start, stop = (
+                int(part) if part.strip() else None
+                for part in match.group("slice").split(":")
+            )
+            steps.append((recursive, "slice", slice(start, stop)))
+        position = match.end()
+    return tuple(steps)
+
+
+def iter_descendants(node):
+    """The node and every value nested in it, depth first."""
+    yield node
+    if isinstance(node, Mapping):
+        for value in node.values():
+            yield from iter_descendants(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from iter_descendants(value)
+
+
+def apply_step(node, kind, value):
+    if kind == "key":
+        if isinstance(node, Mapping) and value in node:
+            yield node[value]
+    elif kind == "index":
+        if isinstance(node, list) and -len(node) <= value < len(node):
+            yield node[value]
+    elif kind == "slice":
+        if isinstance(node, list):
+            yield from node[value]
+    elif isinstance(node, Mapping):
+        yield from node.values()
+    elif isinstance(node, list):
+        yield from node
+
+
+def find(data, expression):
+    """
+    Evaluate a JSONPath against parsed JSON.
+
+    Returns:
+        list: Matched values in document order.
+    """
+    nodes = [data]
+    for recursive, kind, value in compile_jsonpath(expression):
+        if recursive:
+            nodes = [
+                descendant for node in nodes for descendant in iter_descendants(node)
+            ]
+        nodes = [match for node in nodes for match in apply_step(node, kind, value)]
+        if not nodes:
+            break
+    return nodes
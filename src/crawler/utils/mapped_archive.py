@@ -0,0 +1,329 @@
+import bisect
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from src.crawler.utils.archive import (
+    INDEX_SUFFIX,
+    SEGMENT_PREFIX,
+    ArchiveWriter,
+    escape_url,
+    get_payload_member,
+    get_segment_number,
+    iter_index,
+)
+
+
+LOOKUP_FILENAME = "lookup.bin"
+# Sizes of the sidecar indexes a lookup table was built from
+LOOKUP_STATE_FILENAME = "lookup.json"
+# url hash, segment number, offset, length, payload offset, payload length
+LOOKUP_ENTRY = struct.Struct("<QIQIII")
+
+
+def hash_url(url):
+    """Stable 64-bit hash of a URL, unlike the per-process randomised hash()."""
+    return int.from_bytes(
+        hashlib.blake2b(escape_url(url).encode("utf-8"), digest_size=8).digest(),
+        "little",
+    )
+
+
+def build_lookup(archive_dir):
+    """
+    Precompute a sorted, fixed-width URL hash to record offset table.
+
+    The table is written next to the segments so readers can binary search it
+    through a memory map instead of loading the sidecar indexes into a dict.
+
+    Returns:
+        Path: Path of the lookup file.
+    """
+    archive_dir = Path(archive_dir)
+    # Taken before reading, so pages appended meanwhile leave the table stale
+    index_sizes = get_index_sizes(archive_dir)
+    entries = {}
+    for url, segment_name, offset, length, payload_offset, payload_length in iter_index(
+        archive_dir
+    ):
+        # Later records of the same URL replace earlier ones
+        entries[hash_url(url)] = (
+            get_segment_number(segment_name),
+            offset,
+            length,
+            payload_offset,
+            payload_length,
+        )
+
+    lookup_path = archive_dir / LOOKUP_FILENAME
+    tmp_path = lookup_path.with_name(lookup_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        for url_hash in sorted(entries):
+            f.write(LOOKUP_ENTRY.pack(url_hash, *entries[url_hash]))
+    os.replace(tmp_path, lookup_path)
+    state_path = archive_dir / LOOKUP_STATE_FILENAME
+    tmp_path = state_path.with_name(state_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index_sizes, f)
+    os.replace(tmp_path, state_path)
+    return lookup_path
+
+
+def get_index_sizes(archive_dir):
+    return {
+        index_path.name: index_path.stat().st_size
+        for index_path in archive_dir.glob(f"{SEGMENT_PREFIX}*{INDEX_SUFFIX}")
+    }
+
+
+def is_lookup_stale(archive_dir):
+    """
+    Whether pages were appended since the lookup table was built.
+
+    The indexes are append-only, so their sizes are compared with the ones
+    recorded at build time; modification times can be equal for writes
+    within one clock tick.
+    """
+    archive_dir = Path(archive_dir)
+    lookup_path = archive_dir / LOOKUP_FILENAME
+    if not lookup_path.exists():
+        return True
+    try:
+        with open(archive_dir / LOOKUP_STATE_FILENAME, "r", encoding="utf-8") as f:
+            return json.load(f) != get_index_sizes(archive_dir)
+    except (FileNotFoundError, ValueError):
+        # Tables built before the sizes were recorded
+        built_at = lookup_path.stat().st_mtime
+        return any(
+            index_path.stat().st_mtime > built_at
+            for index_path in archive_dir.glob(f"{SEGMENT_PREFIX}*{INDEX_SUFFIX}")
+        )
+
+
+def pack_directory(html_dir, archive_dir, compress=False, pattern="*.html"):
+    """
+    Pack a flat directory of crawled pages into an archive keyed by file name.
+
+    Args:
+        html_dir (str): Directory written by HTMLCrawler with one file per page.
+        archive_dir (str): Destination archive directory.
+        compress (bool): Gzip each record; leave False for zero-copy reads.
+        pattern (str): Glob of the files to pack.
+
+    Returns:
+        int: Number of packed files.
+    """
+    writer = ArchiveWriter(archive_dir, compress=compress)
+    count = 0
+    try:
+        for entry in os.scandir(html_dir):
+            if entry.is_file() and Path(entry.name).match(pattern):
+                with open(entry.path, "rb") as f:
+                    writer.write(entry.name, f.read())
+                count += 1
+    finally:
+        writer.close()
+    build_lookup(archive_dir)
+    return count
+
+
+def get_target_uri(header):
+    """The WARC-Target-URI of a record header, as written by ArchiveWriter."""
+    prefix = b"\r\nWARC-Target-URI: "
+    header = bytes(header)
+    start = header.find(prefix)
+    if start == -1:
+        return None
+    start += len(prefix)
+    return header[start : header.index(b"\r\n", start)].decode("utf-8")
+
+
+def has_target_uri(header, url):
+    target = f"\r\nWARC-Target-URI: {escape_url(url)}\r\n".encode("utf-8")
+    return target in bytes(header)
+
+
+class LookupHashes:
+    """Sequence view of the hashes in a lookup table, so bisect can search it."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.buffer) // LOOKUP_ENTRY.size
+
+    def __getitem__(self, index):
+        return struct.unpack_from("<Q", self.buffer, index * LOOKUP_ENTRY.size)[0]
+
+
+class MappedArchiveReader:
+    """
+    Memory-mapped reader over an archive written by ArchiveWriter.
+
+    Segments and the precomputed lookup table are memory-mapped, so a lookup
+    is a binary search over the mapped table followed by a slice of the mapped
+    segment. Uncompressed archives return the payload as a zero-copy memoryview;
+    compressed records are decompressed on access.
+
+    Args:
+        archive_dir (str): Archive directory.
+        rebuild (bool): Rebuild the lookup table if the sidecar indexes are newer.
+    """
+
+    def __init__(self, archive_dir, rebuild=True):
+        self.archive_dir = Path(archive_dir)
+        if rebuild and is_lookup_stale(self.archive_dir):
+            build_lookup(self.archive_dir)
+
+        self.lookup_file = open(self.archive_dir / LOOKUP_FILENAME, "rb")
+        if os.fstat(self.lookup_file.fileno()).st_size:
+            self.lookup = mmap.mmap(
+                self.lookup_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        else:
+            self.lookup = b""
+        self.hashes = LookupHashes(self.lookup)
+
+        self.segments = {}
+        for segment_path in self.archive_dir.glob(f"{SEGMENT_PREFIX}*"):
+            if segment_path.name.endswith(INDEX_SUFFIX):
+                continue
+            self.segments[get_segment_number(segment_path)] = segment_path
+
+        self.maps = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def __contains__(self, url):
+        return self.find(url) is not None
+
+    def get_segment_map(self, segment_number):
+        segment_map = self.maps.get(segment_number)
+        if segment_map is None:
+            with open(self.segments[segment_number], "rb") as f:
+                segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[segment_number] = segment_map
+        return segment_map
+
+    def find(self, url):
+        """Returns the lookup entry of a URL, or None if it is not archived."""
+        url_hash = hash_url(url)
+        index = bisect.bisect_left(self.hashes, url_hash)
+        if index == len(self.hashes) or self.hashes[index] != url_hash:
+            return None
+        return LOOKUP_ENTRY.unpack_from(self.lookup, index * LOOKUP_ENTRY.size)[1:]
+
+    def get_record(self, url):
+        """Returns the stored record of a URL as a memoryview into its segment."""
+        entry = self.find(url)
+        if entry is None:
+            return None
+        segment_number, offset, length, _, _ = entry
+        return memoryview(self.get_segment_map(segment_number))[
+            offset : offset + length
+        ]
+
+    def get_payload(self, url):
+        """
+        Returns the stored page of a URL as a memoryview, or None if it is missing.
+
+        The view points straight into the mapped segment for uncompressed
+        archives; release it before closing the reader.
+        """
+        entry = self.find(url)
+        if entry is None:
+            return None
+        return self._read_payload(url, *entry)
+
+    def get_gzip_payload(self, url):
+        """
+        Returns the stored gzip member of a URL's page as a memoryview.
+
+        None if the page is missing, the archive is not compressed or the
+        record was gzipped as a whole by an earlier version.
+        """
+        entry = self.find(url)
+        if entry is None or not self.segments[entry[0]].name.endswith(".gz"):
+            return None
+        segment_number, offset, length, _, _ = entry
+        record = memoryview(self.get_segment_map(segment_number))[
+            offset : offset + length
+        ]
+        parts = get_payload_member(record)
+        if parts is None or not has_target_uri(parts[0], url):
+            return None
+        return parts[1]
+
+    def get(self, url):
+        """Returns the stored page of a URL as text, or None if it is missing."""
+        payload = self.get_payload(url)
+        if payload is None:
+            return None
+        with payload:
+            return str(payload, "utf-8")
+
+    def _read_record(self, segment_number, offset, length):
+        record = memoryview(self.get_segment_map(segment_number))[
+            offset : offset + length
+        ]
+        if self.segments[segment_number].name.endswith(".gz"):
+            record = memoryview(gzip.decompress(record))
+        return record
+
+    def _read_payload(
+        self, url, segment_number, offset, length, payload_offset, payload_length
+    ):
+        record = self._read_record(segment_number, offset, length)
+        # A matching hash is confirmed against the record's target URI
+        if not has_target_uri(record[:payload_offset], url):
+            return None
+        return record[payload_offset : payload_offset + payload_length]
+
+    def iter_payloads(self, readahead_bytes=64 * 1024 * 1024):
+        """
+        Yield (url, payload memoryview) for every page in on-disk order.
+
+        The lookup table already holds one entry per URL, so it is sorted by
+        position and the URL is read back from each record's header. The
+        kernel is told that segments are read sequentially and the next
+        readahead_bytes of the current segment are prefetched as the scan moves.
+        """
+        entries = sorted(entry[1:] for entry in LOOKUP_ENTRY.iter_unpack(self.lookup))
+        current_segment = None
+        prefetched_to = 0
+        for segment_number, offset, length, payload_offset, payload_length in entries:
+            segment_map = self.get_segment_map(segment_number)
+            if segment_number != current_segment:
+                current_segment = segment_number
+                prefetched_to = 0
+                if hasattr(segment_map, "madvise"):
+                    segment_map.madvise(mmap.MADV_SEQUENTIAL)
+            if offset + length > prefetched_to and hasattr(segment_map, "madvise"):
+                start = offset - offset % mmap.PAGESIZE
+                size = min(readahead_bytes, len(segment_map) - start)
+                if size > 0:
+                    segment_map.madvise(mmap.MADV_WILLNEED, start, size)
+                prefetched_to = start + size
+
+            record = self._read_record(segment_number, offset, length)
+            url = get_target_uri(record[:payload_offset])
+            if url is not None:
+                yield url, record[payload_offset : payload_offset + payload_length]
+
+    def close(self):
+        for segment_map in self.maps.values():
+            segment_map.close()
+        self.maps = {}
+        if isinstance(self.lookup, mmap.mmap):
+            self.lookup.close()
+        self.lookup_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,100 @@
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+def intern(value):
+    """Share one copy of strings that repeat across many records."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True)
+class UrlRecord:
+    """A link found by UrlExtractor. text is the anchor text and is not saved."""
+
+    url: str
+    path: str = ""
+    depth: int = 0
+    text: str = ""
+
+    def __post_init__(self):
+        # Paths are shared by every link under the same navigation prefix
+        self.path = intern(self.path)
+
+    def to_dict(self):
+        return {"depth": self.depth, "url": self.url, "path": self.path}
+
+
+@dataclass(slots=True)
+class ImageRecord:
+    url: str
+    alt: str = ""
+    filename: str = ""
+    source_url: str = None
+    depth: int = 0
+
+    def __post_init__(self):
+        self.source_url = intern(self.source_url)
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "alt": self.alt,
+            "filename": self.filename,
+            "source_url": self.source_url,
+            "depth": self.depth,
+        }
+
+
+@dataclass(slots=True)
+class TextRecord:
+    id: str
+    text: str
+    attributes: dict = field(default_factory=dict)
+    element_type: str = ""
+    source_url: str = None
+    depth: int = 0
+
+    def __post_init__(self):
+        self.element_type = intern(self.element_type)
+        self.source_url = intern(self.source_url)
+        # Attribute names and common values such as class names repeat a lot
+        self.attributes = {
+            intern(key): intern(value) for key, value in self.attributes.items()
+        }
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "text": self.text,
+            "attributes": self.attributes,
+            "element_type": self.element_type,
+            "source_url": self.source_url,
+            "depth": self.depth,
+        }
+
+
+def save_records(records, directory, source_name, filename=None):
+    """
+    Write records as a JSON array, one record per line.
+
+    Records are encoded one at a time, so no second copy of the result set is
+    built in memory, and the output can still be read with load_json or
+    streamed with iter_json_records.
+    """
+    if filename is None:
+        filename = f"{source_name}.json"
+    file_path = Path(directory) / filename
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        separator = "\n"
+        for record in records:
+            f.write(separator)
+            f.write(encode(record.to_dict()))
+            separator = ",\n"
+        f.write("\n]\n")
+    return file_path
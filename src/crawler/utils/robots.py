@@ -0,0 +1,77 @@
+import logging
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+
+
+class RobotsCache:
+    """
+    Fetches and caches robots.txt rules per host.
+
+    Args:
+        session (requests.Session): Session used to fetch robots.txt.
+        user_agent (str): User-Agent the rules are evaluated for.
+        ttl (int): Seconds before a host's robots.txt is fetched again.
+    """
+
+    def __init__(self, session, user_agent, ttl=24 * 60 * 60):
+        self.session = session
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.parsers = {}
+        self.last_request = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def get_parser(self, url):
+        """Returns the parsed robots.txt for the URL's host, fetching it if needed."""
+        parsed_url = urlparse(url)
+        host = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        cached = self.parsers.get(host)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        parser = RobotFileParser(f"{host}/robots.txt")
+        try:
+            response = self.session.get(f"{host}/robots.txt", timeout=30)
+            # Same semantics as RobotFileParser.read: auth errors block the
+            # whole host, any other client error means there are no rules
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif 400 <= response.status_code < 500:
+                parser.allow_all = True
+            else:
+                response.raise_for_status()
+                parser.parse(response.text.splitlines())
+        except requests.RequestException as e:
+            self.logger.warning(f"Failed to fetch robots.txt for {host}: {e}")
+            parser.allow_all = True
+
+        parser.modified()
+        self.parsers[host] = (time.monotonic(), parser)
+        return parser
+
+    def can_fetch(self, url):
+        return self.get_parser(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        """Returns the Crawl-delay for the URL's host in seconds, or 0."""
+        parser = self.get_parser(url)
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is None:
+            rate = parser.request_rate(self.user_agent)
+            delay = rate.seconds / rate.requests if rate else 0
+        return float(delay)
+
+    def site_maps(self, url):
+        """Returns the Sitemap URLs listed in the host's robots.txt."""
+        return self.get_parser(url).site_maps() or []
+
+    def wait(self, url):
+        """Sleep until the host's crawl delay has passed since the last request."""
+        host = urlparse(url).netloc
+        delay = self.crawl_delay(url)
+        elapsed = time.monotonic() - self.last_request.get(host, 0)
+        if delay and elapsed < delay:
+            time.sleep(delay - elapsed)
+        self.last_request[host] = time.monotonic()
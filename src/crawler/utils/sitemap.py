@@ -0,0 +1,190 @@
+import gzip
+import io
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from lxml import etree
+
+
+def open_sitemap_stream(response):
+    """
+    Wrap a streamed requests response so it can be parsed incrementally.
+
+    Gzipped sitemaps (.xml.gz) are usually served without a Content-Encoding
+    header, so the body is sniffed for the gzip magic number and decompressed
+    on the fly.
+    """
+    response.raw.decode_content = True
+    stream = PrefixedReader(response.raw.read(2), response.raw)
+    if stream.prefix == b"\x1f\x8b":
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+class PrefixedReader(io.RawIOBase):
+    """Replays bytes that were read ahead of a stream, then reads from the stream."""
+
+    def __init__(self, prefix, raw):
+        self.prefix = prefix
+        self.offset = 0
+        self.raw = raw
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.offset < len(self.prefix):
+            data = self.prefix[self.offset : self.offset + len(buffer)]
+            self.offset += len(data)
+        else:
+            data = self.raw.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def iter_sitemap(stream):
+    """
+    Stream entries from a sitemap or sitemap index without building the tree.
+
+    Args:
+        stream: A binary file-like object with the sitemap XML.
+
+    Yields:
+        tuple: (kind, loc, lastmod) where kind is "url" for pages and "sitemap"
+            for the children of a sitemap index, and lastmod is a datetime or None.
+    """
+    for _, element in etree.iterparse(
+        stream, events=("end",), huge_tree=True, resolve_entities=False
+    ):
+        kind = etree.QName(element).localname
+        if kind in ("url", "sitemap"):
+            loc = None
+            lastmod = None
+            for child in element:
+                name = etree.QName(child).localname
+                if name == "loc" and child.text:
+                    loc = child.text.strip()
+                elif name == "lastmod" and child.text:
+                    lastmod = parse_lastmod(child.text)
+            if loc:
+                yield kind, loc, lastmod
+
+            # Drop processed entries so memory does not grow with the sitemap
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def parse_lastmod(value):
+    """Parse a W3C datetime (YYYY, YYYY-MM, YYYY-MM-DD or full timestamp) as UTC."""
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    if len(value) == 4:
+        value += "-01-01"
+    elif len(value) == 7:
+        value += "-01"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class LastmodStore:
+    """
+    Remembers the last seen lastmod of every page and child sitemap.
+
+    Backed by SQLite so that sitemaps with millions of URLs do not need to be
+    held in memory between runs. A page can be scheduled as pending; it is
+    reported as changed on every run until a crawler confirms it was fetched,
+    so a failed fetch does not lose the change.
+    """
+
+    def __init__(self, db_path, batch_size=10000):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS lastmod "
+            "(loc TEXT PRIMARY KEY, lastmod TEXT, seen_at TEXT, "
+            "pending INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {
+            row[1] for row in self.connection.execute("PRAGMA table_info(lastmod)")
+        }
+        if "pending" not in columns:
+            # Stores written before pages could be pending
+            self.connection.execute(
+                "ALTER TABLE lastmod ADD COLUMN pending INTEGER NOT NULL DEFAULT 0"
+            )
+        self.batch_size = batch_size
+        self.uncommitted = 0
+
+    def get(self, loc):
+        row = self.connection.execute(
+            "SELECT lastmod, pending FROM lastmod WHERE loc = ?", (loc,)
+        ).fetchone()
+        if row is None:
+            return None, False
+        if row[1]:
+            # Scheduled but never confirmed, so treated as not seen
+            return None, False
+        return (datetime.fromisoformat(row[0]) if row[0] else None), True
+
+    def is_changed(self, loc, lastmod):
+        """
+        Returns True if the entry is new, pending, or its lastmod is newer
+        than last time.
+
+        Entries without a lastmod are only reported the first time they are seen.
+        """
+        previous, seen = self.get(loc)
+        if not seen:
+            return True
+        if lastmod is None:
+            return False
+        return previous is None or lastmod > previous
+
+    def update(self, loc, lastmod, pending=False):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO lastmod VALUES (?, ?, ?, ?)",
+            (
+                loc,
+                lastmod.isoformat() if lastmod else None,
+                datetime.now(timezone.utc).isoformat(),
+                int(pending),
+            ),
+        )
+        self.count_write()
+
+    def confirm(self, loc):
+        """Mark a pending page as fetched, so its lastmod counts as seen."""
+        self.connection.execute(
+            "UPDATE lastmod SET pending = 0, seen_at = ? WHERE loc = ?",
+            (datetime.now(timezone.utc).isoformat(), loc),
+        )
+        self.count_write()
+
+    def iter_pending(self, seen_before):
+        """Yield (loc, lastmod) of pages still pending since before a time."""
+        rows = self.connection.execute(
+            "SELECT loc, lastmod FROM lastmod WHERE pending = 1 AND seen_at < ?",
+            (seen_before.isoformat(),),
+        )
+        for loc, lastmod in rows:
+            yield loc, datetime.fromisoformat(lastmod) if lastmod else None
+
+    def count_write(self):
+        self.uncommitted += 1
+        if self.uncommitted >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        self.connection.commit()
+        self.uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.connection.close()
@@ -0,0 +1,212 @@
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+import aiohttp
+
+
+# Stages in the order a page goes through them
+STAGES = [
+    "slot_wait",
+    "queue",
+    "dns",
+    "connect",
+    "ttfb",
+    "download",
+    "clean_html",
+    "save",
+]
+
+
+class Trace:
+    """
+    Timings of one URL through fetching, cleaning and saving.
+
+    Network timings come from aiohttp trace callbacks, which receive this
+    object as trace_request_ctx; the other stages are timed by the crawler.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans = {}
+        self.marks = {}
+        self.status = None
+        self.error = None
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def mark(self, name):
+        self.marks[name] = time.perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def to_record(self):
+        spans = dict(self.spans)
+        headers_at = self.marks.get("response_headers")
+        sent_at = self.marks.get("request_headers_sent")
+        if headers_at is not None and sent_at is not None:
+            spans["ttfb"] = headers_at - sent_at
+        fetched_at = self.marks.get("fetched")
+        if headers_at is not None and fetched_at is not None:
+            spans["download"] = fetched_at - headers_at
+        return {
+            "url": self.url,
+            "started_at": self.started_at,
+            "total": time.perf_counter() - self.start,
+            "status": self.status,
+            "error": self.error,
+            "spans": {name: round(seconds, 6) for name, seconds in spans.items()},
+        }
+
+
+def span(trace, name):
+    """Time a stage of a trace, or do nothing when tracing is off."""
+    return trace.span(name) if trace is not None else nullcontext()
+
+
+def _interval(name):
+    """Callbacks that add the time between a start and an end event to a span."""
+
+    async def on_start(session, context, params):
+        trace = context.trace_request_ctx
+        if isinstance(trace, Trace):
+            trace.marks[f"{name}_start"] = time.perf_counter()
+
+    async def on_end(session, context, params):
+        trace = context.trace_request_ctx
+        if isinstance(trace, Trace):
+            started = trace.marks.pop(f"{name}_start", None)
+            if started is not None:
+                trace.add(name, time.perf_counter() - started)
+
+    return on_start, on_end
+
+
+async def _on_request_headers_sent(session, context, params):
+    if isinstance(context.trace_request_ctx, Trace):
+        context.trace_request_ctx.mark("request_headers_sent")
+
+
+async def _on_request_end(session, context, params):
+    if isinstance(context.trace_request_ctx, Trace):
+        context.trace_request_ctx.mark("response_headers")
+
+
+def create_trace_config():
+    """
+    TraceConfig that records connection pool wait, DNS, connect and time to
+    first byte into the Trace passed as trace_request_ctx. Connect includes
+    the TLS handshake, which aiohttp does not report separately.
+    """
+    trace_config = aiohttp.TraceConfig()
+    for name, start_signal, end_signal in [
+        ("queue", "on_connection_queued_start", "on_connection_queued_end"),
+        ("dns", "on_dns_resolvehost_start", "on_dns_resolvehost_end"),
+        ("connect", "on_connection_create_start", "on_connection_create_end"),
+    ]:
+        on_start, on_end = _interval(name)
+        getattr(trace_config, start_signal).append(on_start)
+        getattr(trace_config, end_signal).append(on_end)
+    trace_config.on_request_headers_sent.append(_on_request_headers_sent)
+    trace_config.on_request_end.append(_on_request_end)
+    return trace_config
+
+
+class TraceWriter:
+    """Appends one JSON line per traced URL to a trace file."""
+
+    def __init__(self, trace_file):
+        Path(trace_file).parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(trace_file, "a", encoding="utf-8")
+
+    def write(self, trace):
+        self.file.write(json.dumps(trace.to_record(), ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def load_traces(trace_file):
+    with open(trace_file, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def summarize(records):
+    """
+    Per-stage statistics over trace records.
+
+    Returns:
+        list: One dict per stage with count, mean, p50, p90, p99, max and the
+            stage's share of the summed total time.
+    """
+    total_time = sum(record["total"] for record in records) or 1.0
+    names = STAGES + sorted(
+        {name for record in records for name in record["spans"]} - set(STAGES)
+    )
+    summary = []
+    for name in names:
+        values = sorted(
+            record["spans"][name] for record in records if name in record["spans"]
+        )
+        if not values:
+            continue
+        summary.append(
+            {
+                "stage": name,
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 0.5),
+                "p90": percentile(values, 0.9),
+                "p99": percentile(values, 0.99),
+                "max": values[-1],
+                "share": sum(values) / total_time,
+            }
+        )
+    return summary
+
+
+def format_report(records, top=20):
+    """Text report with the per-stage breakdown and the slowest URLs."""
+    lines = [f"{len(records)} traced URLs", ""]
+    lines.append(
+        f"{'stage':<12}{'count':>8}{'mean ms':>10}{'p50 ms':>10}"
+        f"{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'share':>8}"
+    )
+    for row in summarize(records):
+        lines.append(
+            f"{row['stage']:<12}{row['count']:>8}{row['mean'] * 1000:>10.1f}"
+            f"{row['p50'] * 1000:>10.1f}{row['p90'] * 1000:>10.1f}"
+            f"{row['p99'] * 1000:>10.1f}{row['max'] * 1000:>10.1f}"
+            f"{row['share']:>8.1%}"
+        )
+
+    lines += ["", f"Slowest {top} URLs"]
+    for record in sorted(records, key=lambda r: r["total"], reverse=True)[:top]:
+        stages = ", ".join(
+            f"{name} {seconds * 1000:.0f}"
+            for name, seconds in sorted(
+                record["spans"].items(), key=lambda item: item[1], reverse=True
+            )
+            if seconds >= 0.0005
+        )
+        status = record["error"] or record["status"]
+        lines.append(
+            f"{record['total'] * 1000:>9.1f} ms  {status}  {record['url']}  [{stages}]"
+        )
+    return "\n".join(lines)
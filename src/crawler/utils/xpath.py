@@ -0,0 +1,28 @@
+from functools import lru_cache
+from lxml import etree
+
+
+def compile_xpath(expression, namespaces=None):
+    """
+    Return a compiled XPath for the expression, shared across all pages and spiders.
+
+    Args:
+        expression (str): The XPath expression.
+        namespaces (dict): Optional prefix to namespace URI mapping.
+
+    Returns:
+        etree.XPath: A callable evaluating the expression against an element or tree.
+    """
+    namespace_key = tuple(sorted(namespaces.items())) if namespaces else None
+    return _compile_xpath(expression, namespace_key)
+
+
+@lru_cache(maxsize=1024)
+def _compile_xpath(expression, namespace_key):
+    namespaces = dict(namespace_key) if namespace_key else None
+    return etree.XPath(expression, namespaces=namespaces)
+
+
+def select(element, expression, namespaces=None):
+    """Evaluate a cached compiled XPath against an element."""
+    return compile_xpath(expression, namespaces)(element)
@@ -0,0 +1,289 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from src.crawler.utils.files import iter_json_records
+from src.processing import transform
+from src.utils.logging import setup_logging
+
+
+logger = logging.getLogger(__name__)
+
+# Stages run on crawler outputs, by record type. Bump a stage's version when
+# its output changes in a way the code hash below would not notice.
+STAGES = {
+    "urls": {
+        "version": 1,
+        "schema": transform.URL_SCHEMA,
+        "to_row": transform.url_record_to_row,
+        "partition_cols": ["depth"],
+    },
+    "text": {
+        "version": 1,
+        "schema": transform.TEXT_SCHEMA,
+        "to_row": transform.text_record_to_row,
+        "partition_cols": ["host"],
+    },
+    "images": {
+        "version": 1,
+        "schema": transform.IMAGE_SCHEMA,
+        "to_row": transform.image_record_to_row,
+        "partition_cols": ["host"],
+    },
+}
+
+MANIFEST_DIR = ".jobs"
+
+
+def get_record_type(record):
+    """Which crawler wrote a record, from its keys, or None if unknown."""
+    if "element_type" in record:
+        return "text"
+    if "filename" in record and "alt" in record:
+        return "images"
+    if {"url", "path", "depth"} <= record.keys():
+        return "urls"
+    return None
+
+
+@lru_cache(maxsize=None)
+def get_stage_version(stage_name):
+    """The stage's version and a hash of the code that produces its rows."""
+    stage = STAGES[stage_name]
+    code = Path(transform.__file__).read_bytes()
+    return f"{stage['version']}-{hashlib.sha256(code).hexdigest()[:12]}"
+
+
+def get_chunk_key(stage_name, index, chunk):
+    # The position keeps identical chunks of one file apart; appending to an
+    # input leaves the keys of its earlier chunks unchanged
+    digest = hashlib.sha256(get_stage_version(stage_name).encode("utf-8"))
+    digest.update(f":{index}:".encode("utf-8"))
+    digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def iter_chunks(input_file, chunk_size):
+    """Yield the records of a file as JSON encoded chunks of chunk_size records."""
+    records = iter_json_records(input_file)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield json.dumps(chunk, ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+
+def run_chunk(stage_name, chunk, output_dir, basename):
+    """
+    Run a stage on one chunk in a worker process.
+
+    Returns:
+        tuple: (paths of the written files, number of rows)
+    """
+    stage = STAGES[stage_name]
+    with transform.PartitionedParquetWriter(
+        output_dir, stage["schema"], stage["partition_cols"], basename=basename
+    ) as writer:
+        writer.write_all(stage["to_row"](record) for record in json.loads(chunk))
+    return [str(path) for path in writer.paths], writer.rows_written
+
+
+def find_inputs(input_dir):
+    """Yield (path, record type) of the crawler outputs under input_dir."""
+    for path in sorted(Path(input_dir).rglob("*.json*")):
+        if path.suffix not in (".json", ".jsonl") or not path.is_file():
+            continue
+        try:
+            first = next(iter_json_records(path), None)
+        except (ValueError, UnicodeDecodeError):
+            logger.debug(f"Skipping {path}: not a JSON record file")
+            continue
+        if isinstance(first, dict) and get_record_type(first):
+            yield path, get_record_type(first)
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"input": None, "chunks": {}}
+
+
+def save_manifest(manifest_path, manifest):
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(f"{manifest_path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def get_input_state(input_file, stage_name):
+    stat = input_file.stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "version": get_stage_version(stage_name),
+    }
+
+
+def process_input(
+    executor,
+    input_file,
+    stage_name,
+    output_dir,
+    manifest_path,
+    chunk_size,
+    max_pending,
+    force,
+):
+    """
+    Run a stage over one input file, redoing only chunks that changed.
+
+    Every chunk is keyed by the hash of its records and of the stage version,
+    and the manifest maps the keys of the finished chunks to their files. The
+    manifest is saved after every chunk, so an interrupted run resumes with
+    the chunks that were not finished.
+
+    Returns:
+        dict: Counts of chunks run, reused and removed.
+    """
+    manifest = {"input": None, "chunks": {}} if force else load_manifest(manifest_path)
+    state = get_input_state(input_file, stage_name)
+    stats = {"run": 0, "reused": 0, "removed": 0}
+    if manifest["input"] == state:
+        # Unchanged since the last complete run; not even read
+        stats["reused"] = len(manifest["chunks"])
+        return stats
+
+    keys = set()
+    pending = {}
+
+    def collect(done):
+        for future in done:
+            key = pending.pop(future)
+            paths, rows = future.result()
+            manifest["chunks"][key] = {"files": paths, "rows": rows}
+            save_manifest(manifest_path, manifest)
+            stats["run"] += 1
+
+    for index, chunk in enumerate(iter_chunks(input_file, chunk_size)):
+        key = get_chunk_key(stage_name, index, chunk)
+        keys.add(key)
+        if key in manifest["chunks"] and all(
+            Path(path).exists() for path in manifest["chunks"][key]["files"]
+        ):
+            stats["reused"] += 1
+            continue
+        if len(pending) >= max_pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+        future = executor.submit(
+            run_chunk, stage_name, chunk, str(output_dir), f"part-{key}.parquet"
+        )
+        pending[future] = key
+    if pending:
+        done, _ = wait(pending)
+        collect(done)
+
+    # Outputs of chunks that no longer exist in the input
+    for key in set(manifest["chunks"]) - keys:
+        for path in manifest["chunks"].pop(key)["files"]:
+            Path(path).unlink(missing_ok=True)
+        stats["removed"] += 1
+
+    manifest["input"] = state
+    save_manifest(manifest_path, manifest)
+    return stats
+
+
+def run_jobs(
+    input_dir="data/raw",
+    output_dir="data/processed",
+    chunk_size=50_000,
+    max_workers=None,
+    force=False,
+):
+    """
+    Run the processing stages over every crawler output under input_dir.
+
+    Each input is split into chunks of chunk_size records that are processed
+    in parallel, and written as one Parquet dataset per input:
+    {output_dir}/{stage}/{input path relative to input_dir}/.
+
+    Args:
+        input_dir (str): Directory searched for crawler outputs.
+        output_dir (str): Root of the processed datasets.
+        chunk_size (int): Records per chunk.
+        max_workers (int): Worker processes; the CPU count if None.
+        force (bool): Redo every chunk, ignoring previous runs.
+
+    Returns:
+        dict: Stats per processed input path.
+    """
+    input_dir = Path(input_dir)
+    output_dir = Path(output_dir)
+    max_workers = max_workers or os.cpu_count() or 1
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for input_file, stage_name in find_inputs(input_dir):
+            relative = input_file.relative_to(input_dir)
+            dataset_dir = output_dir / stage_name / relative.with_suffix("")
+            manifest_path = (
+                output_dir
+                / MANIFEST_DIR
+                / stage_name
+                / f"{relative.with_suffix('')}.json"
+            )
+            if force and dataset_dir.exists():
+                shutil.rmtree(dataset_dir)
+            stats = process_input(
+                executor,
+                input_file,
+                stage_name,
+                dataset_dir,
+                manifest_path,
+                chunk_size,
+                # Bound the chunks held in memory while workers are busy
+                max_workers * 2,
+                force,
+            )
+            logger.info(
+                f"{stage_name} {input_file}: {stats['run']} chunks run, "
+                f"{stats['reused']} reused, {stats['removed']} removed"
+            )
+            results[str(input_file)] = stats
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Process new crawler outputs into Parquet datasets"
+    )
+    parser.add_argument("--input-dir", default="data/raw")
+    parser.add_argument("--output-dir", default="data/processed")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--force", action="store_true", help="Redo every chunk of every input"
+    )
+    args = parser.parse_args()
+
+    setup_logging(module_name="processing")
+    run_jobs(
+        args.input_dir,
+        args.output_dir,
+        chunk_size=args.chunk_size,
+        max_workers=args.workers,
+        force=args.force,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import json
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.database import schema
+
+
+# Pool defaults for one API process. Requests beyond pool_size + max_overflow
+# wait up to pool_timeout for a connection instead of opening more, so a burst
+# of requests cannot exhaust the server's max_connections.
+POOL_SIZE = 10
+MAX_OVERFLOW = 10
+POOL_TIMEOUT = 30
+# Connections are replaced before server or proxy idle timeouts close them
+POOL_RECYCLE = 1800
+# Prepared statements kept per connection; the API runs few distinct queries
+STATEMENT_CACHE_SIZE = 256
+STREAM_BATCH_SIZE = 1000
+
+
+def get_async_url(url):
+    """The URL with the asyncpg driver, e.g. for a plain postgresql:// URL."""
+    url = make_url(url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+def create_engine(
+    url,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_recycle=POOL_RECYCLE,
+    statement_cache_size=STATEMENT_CACHE_SIZE,
+    command_timeout=60,
+    application_name="cdhdb",
+):
+    """
+    Create the async engine shared by the API and the ingestion writers.
+
+    Statements run through asyncpg as server-side prepared statements, which
+    are cached per connection, so a repeated query is parsed and planned by
+    PostgreSQL once per connection rather than on every request.
+
+    Args:
+        url (str): Database URL; postgresql:// URLs use asyncpg.
+        pool_size (int): Connections kept open.
+        max_overflow (int): Extra connections opened under load.
+        pool_timeout (float): Seconds to wait for a free connection.
+        pool_recycle (int): Seconds after which a connection is replaced.
+        statement_cache_size (int): Prepared statements cached per connection.
+        command_timeout (float): Seconds before a statement is cancelled.
+        application_name (str): Name shown in pg_stat_activity.
+    """
+    url = get_async_url(url)
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(statement_cache_size)}
+        )
+        connect_args = {
+            "command_timeout": command_timeout,
+            "server_settings": {"application_name": application_name},
+        }
+    return create_async_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+
+async def create_tables(engine):
+    async with engine.begin() as connection:
+        await connection.run_sync(schema.metadata.create_all)
+
+
+async def fetch_all(engine, query):
+    """Rows of a small query as dicts."""
+    async with engine.connect() as connection:
+        result = await connection.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+
+async def stream_rows(engine, query, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield the rows of a query as dicts through a server-side cursor.
+
+    Only batch_size rows are held in memory at a time, however large the
+    result. The connection stays checked out until the generator finishes
+    or is closed, so request handlers serving slow clients use iter_batches.
+    """
+    async with engine.connect() as connection:
+        result = await connection.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.mappings().partitions():
+            for row in partition:
+                yield dict(row)
+
+
+async def ingest(engine, table, rows, batch_size=1000):
+    """
+    Insert rows and refresh the table's summary in one transaction.
+
+    The async counterpart of schema.ingest, with the same statements.
+
+    Args:
+        engine (AsyncEngine): Engine from create_engine.
+        table (Table): Table of schema to insert into.
+        rows (iterable): Row dicts, or an async iterable of them.
+        batch_size (int): Rows per INSERT statement.
+
+    Returns:
+        int: Number of rows read.
+    """
+    count = 0
+    batch = []
+    async with engine.begin() as connection:
+        async for row in aiter_rows(rows):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                await execute_batch(connection, table, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await execute_batch(connection, table, batch)
+            count += len(batch)
+    return count
+
+
+async def aiter_rows(rows):
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+async def execute_batch(connection, table, batch):
+    for statement in schema.get_ingest_statements(table, batch):
+        await connection.execute(statement)
+
+
+async def iter_batches(engine, table, after=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yield the rows of a table in id order, as lists of at most batch_size dicts.
+
+    Unlike stream_rows, a connection is only held while a batch is fetched,
+    so a slow consumer does not keep it from other requests. Each batch
+    continues after the last id of the previous one, which stays an index
+    range scan however far the export has got. Rows added during the
+    export with a higher id are included.
+    """
+    while True:
+        query = select(table).order_by(table.c.id).limit(batch_size)
+        if after is not None:
+            query = query.where(table.c.id > after)
+        rows = await fetch_all(engine, query)
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        after = rows[-1]["id"]
+
+
+async def write_json_lines(
+    engine, table, write, after=None, batch_size=STREAM_BATCH_SIZE
+):
+    """Write the rows of a table after an id to an async write function as JSON lines."""
+    async for rows in iter_batches(engine, table, after, batch_size):
+        lines = [json.dumps(row, ensure_ascii=False, default=str) for row in rows]
+        await write(("\n".join(lines) + "\n").encode("utf-8"))
@@ -0,0 +1,247 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    delete,
+    func,
+    select,
+)
+from sqlalchemy.dialects.postgresql import insert
+
+
+metadata = MetaData()
+
+# Crawled records, one table per kind. The unique constraints make ingest
+# idempotent: a record that is already stored is skipped, and not counted
+# again in the summaries.
+
+articles = Table(
+    "articles",
+    metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("url", Text, nullable=False, unique=True),
+    Column("source", String(100), nullable=False),
+    Column("section", String(100)),
+    Column("headline", Text),
+    Column("published_at", DateTime(timezone=True)),
+)
+
+images = Table(
+    "images",
+    metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("url", Text, nullable=False),
+    Column("source_url", Text, nullable=False),
+    Column("alt", Text),
+    Column("filename", Text),
+    UniqueConstraint("url", "source_url"),
+)
+
+urls = Table(
+    "urls",
+    metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("source", String(100), nullable=False),
+    Column("url", Text, nullable=False),
+    Column("path", Text),
+    Column("depth", Integer, nullable=False),
+    UniqueConstraint("source", "url"),
+)
+
+sillok_entries = Table(
+    "sillok_entries",
+    metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("url", Text, nullable=False, unique=True),
+    Column("king", String(50), nullable=False),
+    Column("year", Integer, nullable=False),
+    Column("month", Integer, nullable=False),
+    Column("day", Integer),
+    Column("text", Text),
+)
+
+# Materialized aggregates read by the API instead of scanning the raw tables
+
+article_counts = Table(
+    "article_counts",
+    metadata,
+    Column("section", String(100), primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("count", BigInteger, nullable=False),
+)
+
+page_image_counts = Table(
+    "page_image_counts",
+    metadata,
+    Column("source_url", Text, primary_key=True),
+    Column("count", BigInteger, nullable=False),
+)
+
+url_depth_counts = Table(
+    "url_depth_counts",
+    metadata,
+    Column("source", String(100), primary_key=True),
+    Column("depth", Integer, primary_key=True),
+    Column("count", BigInteger, nullable=False),
+)
+
+sillok_month_counts = Table(
+    "sillok_month_counts",
+    metadata,
+    Column("king", String(50), primary_key=True),
+    Column("year", Integer, primary_key=True),
+    Column("month", Integer, primary_key=True),
+    Column("count", BigInteger, nullable=False),
+)
+
+# Bumped whenever a summary changes, so caches can tell they are stale
+summary_versions = Table(
+    "summary_versions",
+    metadata,
+    Column("name", String(100), primary_key=True),
+    Column("version", BigInteger, nullable=False),
+    Column("refreshed_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def get_article_keys(table):
+    return {
+        "section": func.coalesce(table.c.section, ""),
+        "day": func.date(table.c.published_at),
+    }
+
+
+def get_article_filter(table):
+    return table.c.published_at.isnot(None)
+
+
+# Summary name to its raw table, its summary table, the group by columns as
+# SQL expressions of a selectable with the raw table's columns, and an
+# optional filter. The same expressions serve the incremental refresh on
+# ingest and the full rebuild. Each raw table feeds at most one summary.
+SUMMARIES = {
+    "article_counts": {
+        "source": articles,
+        "summary": article_counts,
+        "keys": get_article_keys,
+        "filter": get_article_filter,
+    },
+    "page_image_counts": {
+        "source": images,
+        "summary": page_image_counts,
+        "keys": lambda table: {"source_url": table.c.source_url},
+    },
+    "url_depth_counts": {
+        "source": urls,
+        "summary": url_depth_counts,
+        "keys": lambda table: {"source": table.c.source, "depth": table.c.depth},
+    },
+    "sillok_month_counts": {
+        "source": sillok_entries,
+        "summary": sillok_month_counts,
+        "keys": lambda table: {
+            "king": table.c.king,
+            "year": table.c.year,
+            "month": table.c.month,
+        },
+    },
+}
+
+
+def get_summary(table):
+    """Name and definition of the summary fed by a raw table, or (None, None)."""
+    for name, summary in SUMMARIES.items():
+        if summary["source"] is table:
+            return name, summary
+    return None, None
+
+
+def aggregate(summary, selectable):
+    """SELECT keys..., count(*) over selectable grouped like the summary."""
+    keys = summary["keys"](selectable)
+    query = select(*(key.label(name) for name, key in keys.items()), func.count())
+    query = query.select_from(selectable).group_by(*keys.values())
+    if summary.get("filter"):
+        query = query.where(summary["filter"](selectable))
+    return query, list(keys)
+
+
+def bump_version(name):
+    return (
+        insert(summary_versions)
+        .values(name=name, version=1)
+        .on_conflict_do_update(
+            index_elements=[summary_versions.c.name],
+            set_={
+                "version": summary_versions.c.version + 1,
+                "refreshed_at": func.now(),
+            },
+        )
+    )
+
+
+def get_ingest_statements(table, rows):
+    """
+    Statements that store rows and add them to the table's summary.
+
+    The rows are inserted in a CTE that skips rows already stored, and only
+    the rows it returns are counted into the summary with an upsert, all in
+    one statement. Run the statements in one transaction.
+
+    Returns:
+        list: Statements to execute in order.
+    """
+    stored = insert(table).values(rows).on_conflict_do_nothing()
+    name, summary = get_summary(table)
+    if summary is None:
+        return [stored]
+
+    inserted = stored.returning(*table.c).cte("inserted")
+    query, key_names = aggregate(summary, inserted)
+    target = summary["summary"]
+    upsert = insert(target).from_select([*key_names, "count"], query)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=key_names,
+        set_={"count": target.c.count + upsert.excluded["count"]},
+    )
+    return [upsert.add_cte(inserted), bump_version(name)]
+
+
+def ingest(connection, table, rows, batch_size=1000):
+    """Insert rows and refresh the table's summary in one transaction."""
+    rows = list(rows)
+    if not rows:
+        return
+    with connection.begin():
+        for start in range(0, len(rows), batch_size):
+            for statement in get_ingest_statements(
+                table, rows[start : start + batch_size]
+            ):
+                connection.execute(statement)
+
+
+def get_rebuild_statements(name):
+    """Statements that recompute a summary from its raw table."""
+    summary = SUMMARIES[name]
+    target = summary["summary"]
+    query, key_names = aggregate(summary, summary["source"])
+    return [
+        delete(target),
+        insert(target).from_select([*key_names, "count"], query),
+        bump_version(name),
+    ]
+
+
+def rebuild_summaries(connection, names=None):
+    """Recompute summaries from scratch, e.g. after a bulk load or a delete."""
+    with connection.begin():
+        for name in names or SUMMARIES:
+            for statement in get_rebuild_statements(name):
+                connection.execute(statement)
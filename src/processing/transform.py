@@ -0,0 +1,254 @@
+import logging
+from pathlib import Path
+from urllib.parse import quote, urlparse
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from src.crawler.utils.files import iter_json_records
+
+
+logger = logging.getLogger(__name__)
+
+# Columns with few distinct values are dictionary encoded in memory and on disk
+DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+
+URL_SCHEMA = pa.schema(
+    [
+        ("url", pa.string()),
+        ("path", DICTIONARY_STRING),
+        ("host", DICTIONARY_STRING),
+        ("depth", pa.int32()),
+    ]
+)
+
+TEXT_SCHEMA = pa.schema(
+    [
+        ("id", pa.string()),
+        ("text", pa.string()),
+        ("element_type", DICTIONARY_STRING),
+        ("attributes", pa.map_(pa.string(), pa.string())),
+        ("source_url", DICTIONARY_STRING),
+        ("host", DICTIONARY_STRING),
+        ("depth", pa.int32()),
+    ]
+)
+
+IMAGE_SCHEMA = pa.schema(
+    [
+        ("url", pa.string()),
+        ("alt", pa.string()),
+        ("filename", pa.string()),
+        ("source_url", DICTIONARY_STRING),
+        ("host", DICTIONARY_STRING),
+        ("depth", pa.int32()),
+    ]
+)
+
+
+def get_host(url):
+    return urlparse(url).netloc if url else None
+
+
+def url_record_to_row(record):
+    return {
+        "url": record["url"],
+        "path": record.get("path"),
+        "host": get_host(record["url"]),
+        "depth": record.get("depth", 0),
+    }
+
+
+def text_record_to_row(record):
+    return {
+        "id": record.get("id"),
+        "text": record.get("text"),
+        "element_type": record.get("element_type"),
+        "attributes": list((record.get("attributes") or {}).items()),
+        "source_url": record.get("source_url"),
+        "host": get_host(record.get("source_url")),
+        "depth": record.get("depth", 0),
+    }
+
+
+def image_record_to_row(record):
+    return {
+        "url": record["url"],
+        "alt": record.get("alt"),
+        "filename": record.get("filename"),
+        "source_url": record.get("source_url"),
+        "host": get_host(record.get("source_url")),
+        "depth": record.get("depth", 0),
+    }
+
+
+def get_partition_value(value):
+    if value is None:
+        return "__HIVE_DEFAULT_PARTITION__"
+    return quote(str(value), safe="")
+
+
+class PartitionedParquetWriter:
+    """
+    Streams rows into a Hive-partitioned Parquet dataset.
+
+    Rows are buffered per partition and flushed as one row group when the
+    buffer reaches row_group_size, so memory is bounded by the row group size
+    times the number of open partitions rather than by the dataset size.
+
+    Args:
+        output_dir (str): Root directory of the dataset.
+        schema (pa.Schema): Schema of the rows, including partition columns.
+        partition_cols (list): Columns used to split the dataset into directories.
+        row_group_size (int): Rows per row group.
+        compression (str): Parquet compression codec.
+        basename (str): File name used in every partition directory; writers
+            with different basenames can add files to the same dataset.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        schema,
+        partition_cols=None,
+        row_group_size=100_000,
+        compression="zstd",
+        basename="part-0.parquet",
+    ):
+        self.output_dir = Path(output_dir)
+        self.schema = schema
+        self.partition_cols = partition_cols or []
+        self.file_schema = pa.schema(
+            [field for field in schema if field.name not in self.partition_cols]
+        )
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.basename = basename
+        self.buffers = {}
+        self.writers = {}
+        self.paths = []
+        self.rows_written = 0
+
+    def write(self, row):
+        key = tuple(row[col] for col in self.partition_cols)
+        buffer = self.buffers.setdefault(key, [])
+        buffer.append(row)
+        if len(buffer) >= self.row_group_size:
+            self._flush(key)
+
+    def write_all(self, rows):
+        for row in rows:
+            self.write(row)
+        return self
+
+    def _flush(self, key):
+        rows = self.buffers.pop(key, None)
+        if not rows:
+            return
+        writer = self.writers.get(key)
+        if writer is None:
+            partition_dir = self.output_dir.joinpath(
+                *(
+                    f"{col}={get_partition_value(value)}"
+                    for col, value in zip(self.partition_cols, key)
+                )
+            )
+            partition_dir.mkdir(parents=True, exist_ok=True)
+            self.paths.append(partition_dir / self.basename)
+            writer = self.writers[key] = pq.ParquetWriter(
+                partition_dir / self.basename,
+                self.file_schema,
+                compression=self.compression,
+                use_dictionary=True,
+            )
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        writer.write_table(table.drop_columns(self.partition_cols))
+        self.rows_written += len(rows)
+
+    def close(self):
+        for key in list(self.buffers):
+            self._flush(key)
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        return self.rows_written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_records(
+    input_file,
+    output_dir,
+    schema,
+    to_row,
+    partition_cols,
+    row_group_size=100_000,
+):
+    """Stream records from a crawler output file into a partitioned Parquet dataset."""
+    with PartitionedParquetWriter(
+        output_dir, schema, partition_cols, row_group_size
+    ) as writer:
+        writer.write_all(to_row(record) for record in iter_json_records(input_file))
+    logger.info(f"Wrote {writer.rows_written} rows from {input_file} to {output_dir}")
+    return writer.rows_written
+
+
+def export_urls(input_file, output_dir, partition_cols=("depth",), **kwargs):
+    """Export UrlExtractor output (url, path, depth) to Parquet."""
+    return export_records(
+        input_file,
+        output_dir,
+        URL_SCHEMA,
+        url_record_to_row,
+        list(partition_cols),
+        **kwargs,
+    )
+
+
+def export_text(input_file, output_dir, partition_cols=("host",), **kwargs):
+    """Export TextExtractor output (text items with attributes) to Parquet."""
+    return export_records(
+        input_file,
+        output_dir,
+        TEXT_SCHEMA,
+        text_record_to_row,
+        list(partition_cols),
+        **kwargs,
+    )
+
+
+def export_images(input_file, output_dir, partition_cols=("host",), **kwargs):
+    """Export ImageExtractor manifests to Parquet."""
+    return export_records(
+        input_file,
+        output_dir,
+        IMAGE_SCHEMA,
+        image_record_to_row,
+        list(partition_cols),
+        **kwargs,
+    )
+
+
+def read_dataset(path, columns=None, filters=None, schema=None):
+    """
+    Read a partitioned Parquet dataset, pushing filters down to the scan.
+
+    Partition directories that cannot match are skipped, and row groups are
+    pruned using their column statistics before any data is decoded.
+
+    Args:
+        path (str): Root directory of the dataset.
+        columns (list): Columns to read; all columns if None.
+        filters (list): Conditions such as [("depth", "=", 2), ("host", "in", [...])].
+        schema (pa.Schema): Schema used for export; avoids inferring partition
+            types, which fails when a partition column only holds nulls.
+
+    Returns:
+        pa.Table: The matching rows.
+    """
+    dataset = ds.dataset(path, schema=schema, format="parquet", partitioning="hive")
+    expression = pq.filters_to_expression(filters) if filters else None
+    return dataset.to_table(columns=columns, filter=expression)
@@ -1,13 +1,20 @@
-import yaml
+import hashlib
 import logging
 import json
 import os
-from jsonschema import validate, ValidationError
+from functools import lru_cache
+from pathlib import Path
+
+# yaml and jsonschema are imported on a cache miss only; together they take
+# longer to import than a cached load takes in total
 
 
 def load_yaml(file_path):
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     with open(file_path, "r") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=loader)
 
 
 def load_json_schema(schema_path):
@@ -15,25 +22,78 @@ def load_json_schema(schema_path):
         return json.load(file)
 
 
+@lru_cache(maxsize=8)
+def get_validator(schema_text):
+    """Returns a validator for the schema, checked and compiled once per process."""
+    from jsonschema.validators import validator_for
+
+    schema = json.loads(schema_text)
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
 def validate_yaml(yaml_data, schema_data):
+    from jsonschema import ValidationError
+
     try:
-        validate(instance=yaml_data, schema=schema_data)
+        get_validator(json.dumps(schema_data, sort_keys=True)).validate(yaml_data)
         return True
     except ValidationError as err:
         logging.error(f"YAML validation error: {err}")
         return False
 
 
+def get_config_fingerprint(config_bytes, schema_bytes):
+    digest = hashlib.sha256()
+    for part in (config_bytes, schema_bytes):
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def read_cached_config(cache_dir, fingerprint):
+    try:
+        with open(Path(cache_dir) / f"{fingerprint}.json", "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cached_config(cache_dir, fingerprint, config):
+    cache_dir = Path(cache_dir)
+    try:
+        # Configs with values JSON cannot represent, such as YAML dates, are not cached
+        text = json.dumps(config)
+    except (TypeError, ValueError):
+        return
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_dir / f"{fingerprint}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, cache_dir / f"{fingerprint}.json")
+    except OSError as e:
+        logging.warning(f"Could not cache configuration in {cache_dir}: {e}")
+
+
 def load_config(
-    config_path="config.yaml", schema_path="config_schema.json", default_config=None
+    config_path="config.yaml",
+    schema_path="config_schema.json",
+    default_config=None,
+    cache_dir=".cache/config",
 ):
     """
     Load configuration from YAML file and validate it against a JSON schema.
 
+    Validated configurations are cached under a fingerprint of both files, so
+    later runs with unchanged files skip YAML parsing and schema validation.
+
     Args:
         config_path (str): Path to the configuration file.
         schema_path (str): Path to the JSON schema file for validation.
         default_config (dict): Default configuration to return if loading fails.
+        cache_dir (str): Directory of the validated config cache; None disables it.
 
     Returns:
         dict: Configuration dictionary or default_config if loading/validation fails.
@@ -50,6 +110,21 @@ def load_config(
         logging.error(f"Schema file not found: {schema_path}")
         return default_config
 
+    try:
+        config_bytes = Path(config_path).read_bytes()
+        schema_bytes = Path(schema_path).read_bytes()
+    except Exception as e:
+        logging.error(f"Error loading configuration files: {e}")
+        return default_config
+
+    fingerprint = get_config_fingerprint(config_bytes, schema_bytes)
+    if cache_dir:
+        cached = read_cached_config(cache_dir, fingerprint)
+        if cached is not None:
+            return cached
+
+    import yaml
+
     # Load configuration and schema
     try:
         config_file = load_yaml(config_path)
@@ -69,4 +144,6 @@ def load_config(
         logging.error(f"Configuration validation failed for {config_path}")
         return default_config
 
+    if cache_dir:
+        write_cached_config(cache_dir, fingerprint, config_file)
     return config_file
@@ -1,39 +1,185 @@
 from pathlib import Path
+from datetime import datetime, timezone
+import atexit
+import copy
+import json
+import queue
 import sys
 import logging
 import logging.handlers
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
-def setup_logging(module_name="crawler", num_log_files=5):
+# Handlers and listener installed by the last setup_logging call, so calling it
+# again for the next crawler replaces them instead of stacking new ones
+_installed_handlers = []
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps one in every N records of a logger below a level.
+
+    Args:
+        rates (dict): Fraction of records to keep per logger name, e.g.
+            {"UrlExtractor": 0.1}. Child loggers inherit the rate of their parent.
+        default_rate (float): Fraction kept for loggers without a rate.
+        max_level (int): Records above this level are always kept.
+    """
+
+    def __init__(self, rates=None, default_rate=1.0, max_level=logging.INFO):
+        super().__init__()
+        self.rates = rates or {}
+        self.default_rate = default_rate
+        self.max_level = max_level
+        self.counters = {}
+        self.intervals = {}
+
+    def get_interval(self, name):
+        interval = self.intervals.get(name)
+        if interval is None:
+            rate = self.default_rate
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+            interval = self.intervals[name] = max(1, round(1 / rate)) if rate > 0 else 0
+        return interval
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        interval = self.get_interval(record.name)
+        if interval == 0:
+            return False
+        count = self.counters.get(record.name, 0)
+        self.counters[record.name] = count + 1
+        return count % interval == 0
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the traceback separate from the message.
+
+    The default prepare() folds the traceback into the message, which would
+    leave JsonFormatter nothing to put in its exception field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(
+    module_name="crawler",
+    num_log_files=5,
+    level=logging.INFO,
+    use_queue=True,
+    json_format=False,
+    sample_rates=None,
+    default_sample_rate=1.0,
+):
     """
     Set up logging configuration.
 
+    With use_queue, the root logger only puts records on an in-memory queue and
+    a background thread writes them to stdout and the log file, so logging
+    from the event loop never waits on disk I/O.
+
     Args:
         module_name (str): Name of the module for the log directory and filename
         num_log_files (int): Maximum number of log files to keep
+        level (int): Level of the root logger
+        use_queue (bool): Write records from a background listener thread
+        json_format (bool): Write one JSON object per record instead of plain text
+        sample_rates (dict): Fraction of INFO and lower records kept per logger
+        default_sample_rate (float): Fraction kept for loggers without a rate
     """
+    global _listener
 
     log_dir = Path("logs") / module_name
     log_dir.mkdir(parents=True, exist_ok=True)
     # Use a fixed filename without timestamp for proper rotation
     log_file = log_dir / f"{module_name}.log"
 
-    log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    formatter = JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT)
     logger = logging.getLogger(__name__)
+    root = logging.getLogger()
+    root.setLevel(level)
 
-    # Configure root logger
-    logging.basicConfig(
-        level=logging.INFO,
-        format=log_format,
-        handlers=[logging.StreamHandler(sys.stdout)],
-    )
+    # Remove what a previous call installed before adding new handlers
+    stop_listener()
+    for handler in _installed_handlers:
+        root.removeHandler(handler)
+        handler.close()
+    _installed_handlers.clear()
 
+    stream_handler = logging.StreamHandler(sys.stdout)
     # Add rotating file handler
     file_handler = logging.handlers.RotatingFileHandler(
         log_file, maxBytes=1024 * 1024, backupCount=num_log_files
     )
-    file_handler.setFormatter(logging.Formatter(log_format))
-    logging.getLogger().addHandler(file_handler)
+    output_handlers = [stream_handler, file_handler]
+    for handler in output_handlers:
+        handler.setFormatter(formatter)
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        root_handlers = [RecordQueueHandler(log_queue)]
+        _listener = logging.handlers.QueueListener(
+            log_queue, *output_handlers, respect_handler_level=True
+        )
+        _listener.start()
+        _installed_handlers.extend(output_handlers)
+    else:
+        root_handlers = output_handlers
+
+    if sample_rates or default_sample_rate < 1:
+        # Sampling runs before records are queued, so dropped records cost little.
+        # Each handler counts records itself; a shared filter would advance its
+        # counters once per handler. Filters on the root logger would miss
+        # records propagated from other loggers.
+        for handler in root_handlers:
+            handler.addFilter(SamplingFilter(sample_rates, default_sample_rate))
+
+    for handler in root_handlers:
+        root.addHandler(handler)
+    _installed_handlers.extend(root_handlers)
 
     logger.info(f"Starting {module_name} script")
     return logger
+
+
+atexit.register(stop_listener)